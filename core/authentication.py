@@ -0,0 +1,97 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache_backends import _LRU
+from .models import User
+
+AUTH_USER_KEY = 'authuser:{}'
+
+# What a request needs to know about its user. The rest, the password hash
+# included, stays deferred on the request user and is loaded if accessed;
+# saving that user writes only the loaded fields. Kept in model field order,
+# which is how Model.from_db consumes the values.
+CACHED_USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in ('id', 'name', 'email', 'role', 'is_active', 'is_staff')
+)
+
+
+# The shared record is L2-only (settings.CACHES), a SQLite round trip per
+# request; a bounded copy per worker, kept AUTH_USER_LOCAL_TIMEOUT seconds,
+# answers the requests in between. forget_cached_user evicts it in this
+# worker; other workers pick the change up when their copy expires.
+_local_records = _LRU(settings.AUTH_USER_LOCAL_MAX_ENTRIES)
+
+
+def _forget(user_id):
+    key = AUTH_USER_KEY.format(user_id)
+    _local_records.delete(key)
+    cache.delete(key)
+
+
+def forget_cached_user(user_id):
+    """Drop a user's cached record, now and again on commit (see bump_generations)."""
+    _forget(user_id)
+    transaction.on_commit(lambda: _forget(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query: the user id claim
+    selects a cached copy of the user record (AUTH_USER_CACHE_TIMEOUT, fronted
+    by a per-worker copy), which core/signals.py drops whenever the user is
+    saved or deleted. Inactive
+    users and, with CHECK_REVOKE_TOKEN, changed passwords are still refused.
+    """
+
+    def authenticate(self, request):
+        # cache_response (core/cache.py) may have authenticated this request already.
+        result = getattr(request, 'jwt_authentication', None)
+        if result is not None:
+            return result
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = AUTH_USER_KEY.format(user_id)
+        record = _local_records.get(key)
+        if record is None:
+            record = cache.get(key)
+            if record is None:
+                row = (
+                    User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                    .values_list(*CACHED_USER_FIELDS, 'password').first()
+                )
+                if row is None:
+                    raise AuthenticationFailed(_("User not found"), code="user_not_found")
+                *values, password = row
+                record = (tuple(values), get_md5_hash_password(password))
+                cache.set(key, record, settings.AUTH_USER_CACHE_TIMEOUT)
+            _local_records.set(key, record, time.time() + settings.AUTH_USER_LOCAL_TIMEOUT)
+
+        values, password_hash = record
+        # A fresh instance per request: per-request memos live on it.
+        user = User.from_db(router.db_for_read(User), CACHED_USER_FIELDS, values)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,361 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from .cache import bump_generations, project_scope, user_scope
+from .membership import member_project_ids
+from .models import Comment, Project, Task, User
+from .permissions import IsAdminOrPMOrTL
+from .notify import enqueue_task_updates
+from .policy import authorized, compile_rule, denied_message
+from .progress import apply_counter_deltas
+from .serializers import BulkTaskSerializer, TaskSerializer, TaskStatusChangeSerializer
+from .signals import batched_task_writes
+
+# Bulk task writes
+#
+# A batch is validated in one pass with a fixed number of queries whatever
+# its size: one per referenced table (projects, assignees, tasks) and one for
+# title collisions; project membership comes from the cached ids. It is
+# written all or nothing with bulk_create / bulk_update / one filtered delete
+# in a single transaction, and the counters and cache generations are
+# updated once for the batch. Invalid batches answer 400 with a list of
+# errors aligned with the input ({} for the items that were fine).
+
+UPDATABLE_FIELDS = ('title', 'description', 'status', 'assigned_to')
+
+DOES_NOT_EXIST = PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+NOT_A_MEMBER = "You can only add tasks to projects you are a member of."
+TASK_NOT_FOUND = "Task not found."
+DUPLICATE_ID = "This task appears more than once in the request."
+NO_PROJECT_MOVES = "Tasks can't be moved to another project in bulk."
+
+
+def _add_error(errors, index, field, message):
+    errors[index].setdefault(field, []).append(message)
+
+
+def _resolve_assignees(rows, errors):
+    """{user_id: User} for the assignees of ``rows``; unknown ids become errors."""
+    assignee_ids = {row['assigned_to'] for row in rows if row.get('assigned_to') is not None}
+    assignees = User.objects.in_bulk(assignee_ids) if assignee_ids else {}
+    for index, row in enumerate(rows):
+        if row.get('assigned_to') is not None and row['assigned_to'] not in assignees:
+            _add_error(errors, index, 'assigned_to', DOES_NOT_EXIST.format(pk_value=row['assigned_to']))
+    return assignees
+
+
+def _check_titles(placements, errors, renamed_ids=()):
+    """
+    ``placements`` are (index, project_id, title) of the titles the batch
+    writes. Flags titles taken in the project by a task outside
+    ``renamed_ids`` (whose old titles are freed) or repeated in the batch.
+    """
+    if not placements:
+        return
+    taken = set(
+        Task.objects.filter(
+            project_id__in={project_id for _, project_id, _ in placements},
+            title__in={title for _, _, title in placements},
+        ).exclude(pk__in=renamed_ids).values_list('project_id', 'title')
+    )
+    seen = set()
+    for index, project_id, title in placements:
+        if (project_id, title) in taken or (project_id, title) in seen:
+            _add_error(errors, index, 'title', TaskSerializer.duplicate_title_message)
+        seen.add((project_id, title))
+
+
+def _bump_task_scopes(placements):
+    """``placements`` are (project_id, assigned_to_id) pairs the batch touched."""
+    scopes = set()
+    for project_id, assigned_to_id in placements:
+        scopes.update((project_scope(project_id), user_scope(assigned_to_id)))
+    bump_generations(*scopes)
+
+
+def bulk_create_tasks(user, items):
+    """Create the tasks described by ``items``; returns (tasks, None) or (None, errors)."""
+    serializer = BulkTaskSerializer(data=items, many=True)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    rows = serializer.validated_data
+    errors = [{} for _ in rows]
+
+    projects = Project.objects.in_bulk({row['project'] for row in rows})
+    # Authorized once per project, not per item.
+    allowed_projects = set(projects) if user.role == 'ADMIN' else set(projects) & member_project_ids(user)
+    for index, row in enumerate(rows):
+        if row['project'] not in projects:
+            _add_error(errors, index, 'project', DOES_NOT_EXIST.format(pk_value=row['project']))
+        elif row['project'] not in allowed_projects:
+            _add_error(errors, index, 'project', NOT_A_MEMBER)
+        if 'id' in row:
+            _add_error(errors, index, 'id', "Leave out the id when creating tasks.")
+    _resolve_assignees(rows, errors)
+    _check_titles([(index, row['project'], row['title']) for index, row in enumerate(rows)], errors)
+    if any(errors):
+        return None, errors
+
+    tasks = [
+        Task(
+            project_id=row['project'], assigned_to_id=row.get('assigned_to'), created_by=user,
+            **{field: row[field] for field in ('title', 'description', 'status') if field in row},
+        )
+        for row in rows
+    ]
+    try:
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=settings.BULK_TASK_BATCH_SIZE)
+            apply_counter_deltas(Counter((task.project_id, task.status) for task in tasks))
+            _bump_task_scopes((task.project_id, task.assigned_to_id) for task in tasks)
+    except IntegrityError:
+        # A concurrent request took one of the titles after the check above.
+        return None, {"detail": TaskSerializer.duplicate_title_message}
+    return tasks, None
+
+
+def _find_tasks(user, action, ids, errors):
+    """
+    {id: Task} of the ``ids`` that ``user`` may ``action``, in one query;
+    the rest become per-item errors (403 message or not found).
+    """
+    tasks = authorized(Task.objects.filter(pk__in=set(ids)), user, action).in_bulk()
+    missing = set(ids) - set(tasks)
+    if missing:
+        existing = set(Task.objects.filter(pk__in=missing).values_list('pk', flat=True))
+        for index, pk in enumerate(ids):
+            if pk in missing:
+                _add_error(errors, index, 'id', denied_message(user, 'task', action) if pk in existing else TASK_NOT_FOUND)
+    return tasks
+
+
+def _duplicate_ids(ids, errors):
+    seen = set()
+    for index, pk in enumerate(ids):
+        if pk in seen:
+            _add_error(errors, index, 'id', DUPLICATE_ID)
+        seen.add(pk)
+
+
+def bulk_update_tasks(user, items):
+    """
+    Apply partial updates ({"id": ..., field: value, ...}) to existing tasks;
+    returns (tasks, None) or (None, errors).
+    """
+    serializer = BulkTaskSerializer(data=items, many=True, partial=True)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    rows = serializer.validated_data
+    errors = [{} for _ in rows]
+
+    for index, row in enumerate(rows):
+        if 'id' not in row:
+            _add_error(errors, index, 'id', "This field is required.")
+        if 'project' in row:
+            _add_error(errors, index, 'project', NO_PROJECT_MOVES)
+    if any(errors):
+        return None, errors
+
+    ids = [row['id'] for row in rows]
+    _duplicate_ids(ids, errors)
+    tasks = _find_tasks(user, 'update', ids, errors)
+    _resolve_assignees(rows, errors)
+
+    renamed = {
+        row['id']: (index, tasks[row['id']].project_id, row['title'])
+        for index, row in enumerate(rows)
+        if row['id'] in tasks and 'title' in row and row['title'] != tasks[row['id']].title
+    }
+    _check_titles(list(renamed.values()), errors, renamed_ids=renamed)
+    if any(errors):
+        return None, errors
+
+    deltas = Counter()
+    touched = []
+    fields = set()
+    for row in rows:
+        task = tasks[row['id']]
+        touched.append((task.project_id, task.assigned_to_id))
+        if 'status' in row and row['status'] != task.status:
+            deltas[(task.project_id, task.status)] -= 1
+            deltas[(task.project_id, row['status'])] += 1
+        for field in UPDATABLE_FIELDS:
+            if field in row:
+                setattr(task, 'assigned_to_id' if field == 'assigned_to' else field, row[field])
+                fields.add(field)
+        touched.append((task.project_id, task.assigned_to_id))
+
+    updated = [tasks[pk] for pk in ids]
+    if fields:
+        # bulk_update skips auto_now.
+        now = timezone.now()
+        for task in updated:
+            task.updated_at = now
+        fields.add('updated_at')
+    try:
+        with transaction.atomic():
+            if fields:
+                Task.objects.bulk_update(updated, sorted(fields), batch_size=settings.BULK_TASK_BATCH_SIZE)
+            apply_counter_deltas(deltas)
+            _bump_task_scopes(touched)
+    except IntegrityError:
+        # Titles swapped within the batch, or taken concurrently.
+        return None, {"detail": TaskSerializer.duplicate_title_message}
+    return updated, None
+
+
+def bulk_delete_tasks(user, ids):
+    """Delete the tasks ``ids`` (and their comments); returns (count, None) or (None, errors)."""
+    errors = [{} for _ in ids]
+    _duplicate_ids(ids, errors)
+    tasks = _find_tasks(user, 'delete', ids, errors)
+    if any(errors):
+        return None, errors
+
+    with transaction.atomic(), batched_task_writes():
+        # The comments go with their tasks; their audience is invalidated too.
+        comment_placements = set(
+            Comment.objects.filter(task_id__in=tasks).values_list('project_id', 'created_by_id')
+        )
+        Task.objects.filter(pk__in=tasks).delete()
+        deltas = Counter()
+        for task in tasks.values():
+            deltas[(task.project_id, task.status)] -= 1
+        apply_counter_deltas(deltas)
+        _bump_task_scopes([(task.project_id, task.assigned_to_id) for task in tasks.values()] +
+                          list(comment_placements))
+    return len(tasks), None
+
+
+def bulk_update_task_statuses(user, items):
+    """
+    Apply {"id": ..., "status": ...} changes to tasks ``user`` may
+    update_status (a developer's own tasks). Ownership is checked in one
+    query and each target status is one UPDATE; the tech leads get one
+    e-mail per project listing the changes. Returns (changed tasks, None)
+    or (None, errors).
+    """
+    serializer = TaskStatusChangeSerializer(data=items, many=True)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    rows = serializer.validated_data
+    errors = [{} for _ in rows]
+
+    ids = [row['id'] for row in rows]
+    _duplicate_ids(ids, errors)
+    tasks = _find_tasks(user, 'update_status', ids, errors)
+    if any(errors):
+        return None, errors
+
+    by_status = defaultdict(list)
+    deltas = Counter()
+    changed = []
+    now = timezone.now()
+    for row in rows:
+        task = tasks[row['id']]
+        if row['status'] == task.status:
+            continue
+        deltas[(task.project_id, task.status)] -= 1
+        deltas[(task.project_id, row['status'])] += 1
+        task.status = row['status']
+        task.updated_at = now
+        by_status[task.status].append(task.pk)
+        changed.append(task)
+
+    with transaction.atomic():
+        for new_status, pks in by_status.items():
+            # Ownership again in the UPDATE: a task reassigned since the check is left alone.
+            updated = authorized(Task.objects.filter(pk__in=pks), user, 'update_status').update(
+                status=new_status, updated_at=now,
+            )
+            if updated != len(pks):
+                transaction.set_rollback(True)
+                return None, {"detail": "Some of these tasks changed meanwhile; please try again."}
+        apply_counter_deltas(deltas)
+        enqueue_task_updates(changed, user.name)
+        _bump_task_scopes((task.project_id, task.assigned_to_id) for task in changed)
+    return changed, None
+
+
+class TaskBulkView(generics.GenericAPIView):
+    """
+    POST a list of tasks to create them, PATCH a list of {"id": ..., fields}
+    to update them, DELETE {"ids": [...]} to delete them. Admins, Project
+    Managers and Tech Leads only; new tasks go to projects the requester is
+    a member of.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdminOrPMOrTL]
+
+
+    def get_items(self, data):
+        if not isinstance(data, list) or not data:
+            return None, Response({"detail": "Expected a non-empty list of tasks."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(data) > settings.BULK_TASK_MAX_ITEMS:
+            return None, Response({"detail": f"At most {settings.BULK_TASK_MAX_ITEMS} tasks per request."},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        return data, None
+
+
+    def post(self, request, *args, **kwargs):
+        items, error = self.get_items(request.data)
+        if error:
+            return error
+        tasks, errors = bulk_create_tasks(request.user, items)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TaskSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+
+
+    def patch(self, request, *args, **kwargs):
+        items, error = self.get_items(request.data)
+        if error:
+            return error
+        tasks, errors = bulk_update_tasks(request.user, items)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TaskSerializer(tasks, many=True).data, status=status.HTTP_200_OK)
+
+
+    def delete(self, request, *args, **kwargs):
+        ids, error = self.get_items(request.data.get('ids') if isinstance(request.data, dict) else None)
+        if error:
+            return error
+        if not all(isinstance(pk, int) for pk in ids):
+            return Response({"detail": "ids must be a list of integers."}, status=status.HTTP_400_BAD_REQUEST)
+        deleted, errors = bulk_delete_tasks(request.user, ids)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": f"{deleted} tasks deleted successfully.", "deleted": deleted},
+                        status=status.HTTP_200_OK)
+
+
+
+class TaskStatusBatchView(generics.GenericAPIView):
+    """
+    PATCH a list of {"id": ..., "status": ...} to update the status of
+    several tasks assigned to the requester (Developers).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+
+    def patch(self, request, *args, **kwargs):
+        if compile_rule(request.user, 'task', 'update_status') is None:
+            return Response({"detail": denied_message(request.user, 'task', 'update_status')},
+                            status=status.HTTP_403_FORBIDDEN)
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Expected a non-empty list of status changes."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.BULK_TASK_MAX_ITEMS:
+            return Response({"detail": f"At most {settings.BULK_TASK_MAX_ITEMS} tasks per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        changed, errors = bulk_update_task_statuses(request.user, items)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"detail": f"{len(changed)} task statuses updated.", "updated": [task.id for task in changed]},
+                        status=status.HTTP_200_OK)
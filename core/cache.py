@@ -0,0 +1,171 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (
+    get_cache_key, get_conditional_response, learn_cache_key, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import parse_http_date_safe
+from rest_framework.exceptions import APIException
+
+# Generation keys
+#
+# Every cached response is stored under a key prefix derived from the current
+# "generation" tokens of the scopes it depends on. A write bumps the tokens of
+# the scopes it touches, which makes every dependent entry unreachable; the
+# stale entries simply age out. Scopes:
+#   all            - anything changed (admin views see everything)
+#   project:<id>   - a project, its members, tasks or comments changed
+#   user:<id>      - a user record or something addressed to that user changed
+
+GENERATION_KEY = 'gen:{}'
+
+
+def project_scope(project_id):
+    return f'project:{project_id}' if project_id is not None else None
+
+
+def user_scope(user_id):
+    return f'user:{user_id}' if user_id is not None else None
+
+
+def _new_token():
+    return time.time_ns()
+
+
+def get_generations(scopes):
+    """Return {scope: token}, minting a token for scopes never seen before."""
+    keys = {GENERATION_KEY.format(scope): scope for scope in scopes}
+    found = cache.get_many(keys.keys())
+    missing = {key: _new_token() for key in keys if key not in found}
+    if missing:
+        # A missing token must never be reset to a value used before, or an
+        # evicted generation could resurrect entries cached under it.
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {keys[key]: token for key, token in found.items()}
+
+
+def _bump(scopes):
+    cache.set_many({GENERATION_KEY.format(scope): _new_token() for scope in scopes}, timeout=None)
+
+
+def bump_generations(*scopes):
+    """
+    Invalidate every cached response depending on the given scopes.
+
+    Bumps immediately and once more when the surrounding transaction commits,
+    so a concurrent reader can't re-cache pre-commit rows under the new token.
+    """
+    scopes = {scope for scope in scopes if scope} | {'all'}
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def request_identity(user, per_user_roles=()):
+    """
+    Return (identity, scopes) for ``user``.
+
+    The identity holds only what changes the response of the cached views:
+    the role, plus for non-admins the projects they are a member of and the
+    projects they created. Users with the same identity share cache entries,
+    and a token refresh does not start a new one. Roles listed in
+    ``per_user_roles`` see data addressed to them personally (e.g. comments
+    on their assigned tasks), so their identity also includes the user id.
+    Both project id sets come from the membership cache (core/membership.py),
+    so a cache hit costs no query.
+    """
+    if user.role == 'ADMIN':
+        return 'ADMIN', ['all']
+
+    from .membership import created_project_ids, member_project_ids
+    member_ids, created_ids = member_project_ids(user), created_project_ids(user)
+
+    identity = (
+        f'{user.role}|m:{",".join(map(str, sorted(member_ids)))}'
+        f'|c:{",".join(map(str, sorted(created_ids)))}'
+    )
+    scopes = [project_scope(pk) for pk in member_ids | created_ids]
+    if user.role in per_user_roles:
+        identity += f'|u:{user.pk}'
+        scopes.append(user_scope(user.pk))
+    return identity, scopes
+
+
+def _authenticate(request):
+    from .authentication import CachedJWTAuthentication
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    # The view's authentication reuses it (CachedJWTAuthentication.authenticate).
+    request.jwt_authentication = result
+    return result[0] if result else None
+
+
+def _key_prefix(request, per_user_roles):
+    user = _authenticate(request)
+    if user is None:
+        return None
+    identity, scopes = request_identity(user, per_user_roles)
+    generations = get_generations(scopes)
+    request.cache_generations = generations  # Read by ReplicaReadMixin (core/routers.py).
+    request.cache_identity = identity  # Read by ConditionalListMixin (core/conditional.py).
+    fingerprint = identity + '#' + ';'.join(f'{scope}={generations[scope]}' for scope in sorted(generations))
+    return 'resp.' + hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def cache_response(timeout=None, per_user_roles=()):
+    """
+    Like ``cache_page`` but keyed on the requester's identity (see
+    ``request_identity``) and the generations of the scopes it depends on,
+    so entries are shared by users who see the same data and invalidated by
+    writes instead of by a short TTL. The URL, query string included, is
+    part of the key as with ``cache_page``.
+    """
+    if timeout is None:
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            key_prefix = _key_prefix(request, per_user_roles)
+            if key_prefix is None:
+                # Unauthenticated; let the view produce its 401.
+                return view_func(request, *args, **kwargs)
+
+            cache_key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+            if cache_key is not None:
+                response = cache.get(cache_key)
+                if response is not None and response.has_header('ETag'):
+                    # The entry is current, so are its validators (core/conditional.py): 304 if they match.
+                    last_modified = response.get('Last-Modified')
+                    return get_conditional_response(
+                        request, etag=response['ETag'],
+                        last_modified=last_modified and parse_http_date_safe(last_modified), response=response,
+                    )
+                if response is not None:
+                    return response
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+
+            # Clients must revalidate; freshness is enforced server-side.
+            patch_cache_control(response, private=True, no_cache=True)
+            cache_key = learn_cache_key(request, response, timeout, key_prefix, cache=cache)
+            # Added after learning the key: the identity above already covers it.
+            patch_vary_headers(response, ['Authorization'])
+            if hasattr(response, 'render') and callable(response.render):
+                response.add_post_render_callback(lambda r: cache.set(cache_key, r, timeout))
+            else:
+                cache.set(cache_key, response, timeout)
+            return response
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,288 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Django creates one backend instance per thread, so the tiers and counters
+# live at module level, shared by every instance with the same LOCATION.
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class _LRU:
+    """Bounded, thread-safe, in-process LRU holding pickled values."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires is not None and expires <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires):
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _SQLiteStore:
+    """
+    Shared key/value store in a single SQLite file, usable by every worker
+    process on the host. A location starting with ':memory:' gives a
+    process-private store instead (tests); ':memory:<name>' keeps them apart.
+    """
+
+    def __init__(self, location, max_entries, cull_frequency):
+        if str(location).startswith(':memory:'):
+            self.path = f'file:tms-cache-{id(self)}?mode=memory&cache=shared'
+            self.uri = True
+            self._keepalive = sqlite3.connect(self.path, uri=True, check_same_thread=False)
+        else:
+            self.path = str(location)
+            self.uri = False
+        self.max_entries = max_entries
+        self.cull_frequency = cull_frequency
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+        )
+        self._connection().execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, uri=self.uri, timeout=5, isolation_level=None)
+            if not self.uri:
+                conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(self, keys):
+        found = {}
+        now = time.time()
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._connection().execute(
+                f'SELECT key, value, expires FROM cache WHERE key IN ({placeholders})'
+                ' AND (expires IS NULL OR expires > ?)',
+                [*chunk, now],
+            ).fetchall()
+            found.update((key, (value, expires)) for key, value, expires in rows)
+        return found
+
+    def set(self, key, value, expires):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, value, expires),
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, expires):
+        conn = self._connection()
+        conn.execute('DELETE FROM cache WHERE key = ? AND expires <= ?', (key, time.time()))
+        added = conn.execute(
+            'INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, value, expires),
+        ).rowcount == 1
+        if added:
+            self._maybe_cull()
+        return added
+
+    def touch(self, key, expires):
+        return self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (expires, key, time.time()),
+        ).rowcount == 1
+
+    def delete(self, key):
+        return self._connection().execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount == 1
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def _maybe_cull(self):
+        # Counting rows on every write would dominate the write cost; checking
+        # every few writes keeps the table within a small margin of the cap.
+        self._writes += 1
+        if self._writes % 64:
+            return
+        conn = self._connection()
+        conn.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = self.count()
+        if count > self.max_entries and self.cull_frequency == 0:
+            conn.execute('DELETE FROM cache')
+        elif count > self.max_entries:
+            # Evict the entries closest to expiry; NULL (never expires) last.
+            conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self.cull_frequency,),
+            )
+
+
+class TwoTierCache(BaseCache):
+    """
+    Process-local LRU (L1) in front of a host-wide SQLite store (L2).
+
+    Reads check L1, then L2, and promote L2 hits into L1. Writes go to both.
+    L1 entries live at most ``L1_TIMEOUT`` seconds so deletes made by other
+    workers are picked up; keys starting with one of ``L2_ONLY_PREFIXES``
+    (mutable values such as generation tokens) are never held in L1.
+
+    OPTIONS: MAX_ENTRIES, CULL_FREQUENCY (L2), L1_MAX_ENTRIES, L1_TIMEOUT,
+    L2_ONLY_PREFIXES.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l1_timeout = options.get('L1_TIMEOUT', 60)
+        self.l2_only_prefixes = tuple(options.get('L2_ONLY_PREFIXES', ()))
+        with _tiers_lock:
+            if location not in _tiers:
+                _tiers[location] = (
+                    _LRU(options.get('L1_MAX_ENTRIES', 1000)),
+                    _SQLiteStore(location, self._max_entries, self._cull_frequency),
+                    threading.Lock(),
+                    {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'sets': 0},
+                )
+            self._l1, self._l2, self._stats_lock, self._stats = _tiers[location]
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def _l1_allowed(self, key):
+        return not key.startswith(self.l2_only_prefixes)
+
+    def _l1_expiry(self, expires):
+        cap = time.time() + self.l1_timeout
+        return cap if expires is None else min(expires, cap)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        made = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = {}
+        l2_keys = []
+        for made_key, key in made.items():
+            value = self._l1.get(made_key) if self._l1_allowed(key) else None
+            if value is None:
+                l2_keys.append(made_key)
+            else:
+                found[key] = pickle.loads(value)
+        self._count('l1_hits', len(found))
+
+        if l2_keys:
+            rows = self._l2.get_many(l2_keys)
+            for made_key, (value, expires) in rows.items():
+                key = made[made_key]
+                if self._l1_allowed(key):
+                    self._l1.set(made_key, value, self._l1_expiry(expires))
+                found[key] = pickle.loads(value)
+            self._count('l2_hits', len(rows))
+            self._count('misses', len(l2_keys) - len(rows))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        self._l2.set(made_key, pickled, expires)
+        if self._l1_allowed(key):
+            self._l1.set(made_key, pickled, self._l1_expiry(expires))
+        else:
+            self._l1.delete(made_key)
+        self._count('sets')
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        expires = self.get_backend_timeout(timeout)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        if not self._l2.add(made_key, pickled, expires):
+            return False
+        if self._l1_allowed(key):
+            self._l1.set(made_key, pickled, self._l1_expiry(expires))
+        self._count('sets')
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(made_key)
+        return self._l2.touch(made_key, self.get_backend_timeout(timeout))
+
+    def delete(self, key, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(made_key)
+        return self._l2.delete(made_key)
+
+    def has_key(self, key, version=None):
+        return self.get(key, self._missing_key, version=version) is not self._missing_key
+
+    def clear(self):
+        self._l1.clear()
+        self._l2.clear()
+
+    def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT):
+        # Absolute expiry timestamp, or None for "never expires".
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return time.time() + max(timeout, 0)
+
+    def stats(self):
+        """Hit/miss counters of this process plus current tier sizes."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['l1_hits'] + stats['l2_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['l1_hits'] + stats['l2_hits']) / lookups, 4) if lookups else None
+        stats['l1_entries'] = len(self._l1)
+        stats['l1_max_entries'] = self._l1.max_entries
+        stats['l2_entries'] = self._l2.count()
+        stats['l2_max_entries'] = self._max_entries
+        return stats
@@ -0,0 +1,98 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .fieldsets import requested_expansions
+from .policy import PolicyObjectMixin, authorized
+
+# Conditional GET
+#
+# Detail and list responses send an ETag (and details a Last-Modified), and
+# a request whose If-None-Match / If-Modified-Since still match is answered
+# 304 before anything is loaded or serialized:
+#   detail - the row's updated_at, looked up by primary key (one query)
+#   list   - the requester's identity and the generation tokens of the
+#            scopes it depends on, which cache_response has already read
+#            (core/cache.py): any write to those scopes moves them, and no
+#            query is needed
+# The ETag also covers the URL (page, ?fields=, filters) and the media type.
+# Lists send no Last-Modified: generations aren't times. With ?expand= the
+# nested objects have no updated_at of their own, so those detail responses
+# carry no validators.
+#
+# cache_response keeps the headers with the cached response and answers 304
+# from them on a cache hit.
+
+
+def make_etag(*parts):
+    return 'W/"{}"'.format(hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    For generic read views over a model with ``updated_at``; subclasses
+    provide ``get_validators``.
+    """
+
+    def get_validators(self):
+        """(version, last_modified datetime or None) of the response, or None for no validators."""
+        return None
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        version, last_modified = validators
+        etag = make_etag(version, request.accepted_media_type, request.get_full_path())
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        if response.status_code == 304:
+            # What cache_response puts on the 200.
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+class ConditionalObjectMixin(ConditionalGetMixin):
+    """Validators of a detail view: the object's updated_at, in one primary-key lookup."""
+
+    def get_validators(self):
+        if requested_expansions(self.request, getattr(self.get_serializer_class(), 'expandable_fields', {})):
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(self, PolicyObjectMixin):
+            queryset = authorized(queryset, self.request.user, self.get_policy_action())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = (
+            queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list('pk', 'updated_at').first()
+        )
+        if row is None:
+            return None  # Not found or forbidden: the view answers as usual.
+        pk, updated_at = row
+        return f'{pk}@{updated_at.isoformat()}', updated_at
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """
+    Validators of a list view under cache_response: the requester's identity
+    and generation tokens, without a query. None outside cache_response.
+    """
+
+    def get_validators(self):
+        identity = getattr(self.request, 'cache_identity', None)
+        generations = getattr(self.request, 'cache_generations', None)
+        if identity is None or generations is None:
+            return None
+        tokens = ';'.join(f'{scope}={generations[scope]}' for scope in sorted(generations))
+        return f'{identity}#{tokens}', None
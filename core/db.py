@@ -0,0 +1,109 @@
+import os
+import time
+
+from django.conf import settings
+
+# SQLite connection profile
+#
+# Every new SQLite connection runs the PRAGMAs in settings.SQLITE_PRAGMAS
+# (hooked up to ``connection_created`` in core/signals.py). WAL lets readers
+# run alongside the single writer, and busy_timeout makes a blocked writer
+# wait instead of failing with "database is locked".
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to a freshly opened SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def _pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name}')
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def database_files(connection):
+    """Paths of the database file and its -wal file, or () for in-memory databases."""
+    name = str(connection.settings_dict['NAME'])
+    if connection.is_in_memory_db() or not os.path.exists(name):
+        return ()
+    return name, f'{name}-wal'
+
+
+def database_sizes(connection):
+    """
+    Sizes in bytes: ``pages`` (page_count * page_size), ``free`` (pages on
+    the freelist), and ``file`` / ``wal`` on disk for file databases.
+    """
+    with connection.cursor() as cursor:
+        page_size = _pragma(cursor, 'page_size')
+        sizes = {
+            'pages': _pragma(cursor, 'page_count') * page_size,
+            'free': _pragma(cursor, 'freelist_count') * page_size,
+        }
+    for key, path in zip(('file', 'wal'), database_files(connection)):
+        sizes[key] = os.path.getsize(path) if os.path.exists(path) else 0
+    return sizes
+
+
+def run_maintenance(connection, checkpoint='TRUNCATE', vacuum_pages=0, full_vacuum=False):
+    """
+    Run the maintenance steps on ``connection`` and return [(step, seconds, detail)].
+
+    ANALYZE refreshes the planner statistics and PRAGMA optimize lets SQLite
+    redo whatever it considers stale. An incremental vacuum releases up to
+    ``vacuum_pages`` free pages (0 for all) but only works once auto_vacuum
+    is INCREMENTAL; ``full_vacuum`` switches the database to that mode with a
+    one-off VACUUM, which rewrites the whole file. The WAL checkpoint then
+    copies committed pages back into the database (TRUNCATE also empties the
+    -wal file). Must not run inside a transaction.
+    """
+    steps = []
+
+    def step(name, sql, describe=lambda rows: ''):
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            rows = cursor.fetchall() if cursor.description else []
+        steps.append((name, time.perf_counter() - start, describe(rows)))
+
+    def describe_checkpoint(rows):
+        busy, log_frames, checkpointed = rows[0]
+        if log_frames == -1:
+            return 'not in WAL mode'
+        if checkpoint == 'TRUNCATE' and not busy:
+            return 'WAL checkpointed and truncated'
+        return f'{checkpointed}/{log_frames} frames' + (' (busy)' if busy else '')
+
+    step('analyze', 'ANALYZE')
+    step('optimize', 'PRAGMA optimize')
+    if full_vacuum:
+        step('auto_vacuum', 'PRAGMA auto_vacuum = INCREMENTAL')
+        step('vacuum', 'VACUUM')
+
+    with connection.cursor() as cursor:
+        incremental = _pragma(cursor, 'auto_vacuum') == 2
+    if incremental:
+        with connection.cursor() as cursor:
+            free = _pragma(cursor, 'freelist_count')
+        start = time.perf_counter()
+        # incremental_vacuum frees one page per step, but the sqlite3 module
+        # steps a statement without result columns only once; executescript
+        # runs it to completion.
+        connection.connection.executescript(
+            f'PRAGMA incremental_vacuum({vacuum_pages})' if vacuum_pages else 'PRAGMA incremental_vacuum'
+        )
+        seconds = time.perf_counter() - start
+        with connection.cursor() as cursor:
+            freed = free - _pragma(cursor, 'freelist_count')
+        steps.append(('incremental_vacuum', seconds, f'{freed} pages released'))
+    else:
+        steps.append(('incremental_vacuum', 0.0, 'skipped: auto_vacuum is not INCREMENTAL'))
+
+    # Last, so the pages written by the steps above are checkpointed too.
+    step('checkpoint', f'PRAGMA wal_checkpoint({checkpoint})', describe_checkpoint)
+    return steps
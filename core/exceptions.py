@@ -8,3 +8,9 @@ class InvalidUserDataException(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = 'Invalid data provided for user creation.'
     default_code = 'invalid_user_data'
+
+
+class DuplicateCommentException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'Duplicate comment: You already posted this content for the same task/project.'
+    default_code = 'duplicate_comment'
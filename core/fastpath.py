@@ -0,0 +1,166 @@
+import copy
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder is used without it.
+    orjson = None
+
+# Read fast path for lists
+#
+# Once the queries are cheap, most of a list request goes into the
+# serializer: a field tree per request, then get_attribute and
+# to_representation per field per row. When every field of the (sparse)
+# serializer is a plain column, ValuesListMixin pages through .values()
+# rows instead and builds each output dict with mappers prepared once per
+# field set: a column name plus, where the stored value isn't already its
+# representation, a converter (datetimes: the timezone is looked up once per
+# page, not per row; other types: the field's own to_representation). The
+# output is the same as ``get_serializer(page, many=True).data``; anything
+# else (expanded relations, many-to-many, computed fields) takes the
+# serializer. `python manage.py bench_serialization` compares the two.
+
+# Fields whose representation of a stored, non-null value is the value itself.
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField)
+
+
+def _datetime_converter(field):
+    """
+    DateTimeField.to_representation for ISO 8601 output, taking the field's
+    timezone once; unusual values (naive with USE_TZ, aware without) go
+    through the field itself.
+    """
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def convert(value):
+        aware = value.utcoffset() is not None
+        if aware != (field_timezone is not None):
+            return field.to_representation(value)
+        if aware:
+            value = value.astimezone(field_timezone)
+        text = value.isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
+
+def _converter_factory(field):
+    """A callable returning the converter for one page, or None when values pass through."""
+    if type(field) in IDENTITY_FIELDS:
+        return None
+    # A fresh, unbound copy: the cached mapper mustn't keep this request's serializer alive.
+    field = copy.deepcopy(field)
+    if (type(field) is serializers.DateTimeField
+            and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601):
+        return lambda: _datetime_converter(field)
+    return lambda: field.to_representation
+
+
+class RowMapper:
+    """Turns .values() rows into the serializer's output dicts."""
+
+    def __init__(self, columns, mappers):
+        self.columns = columns
+        self.mappers = mappers
+
+    def map(self, rows):
+        mappers = [
+            (name, column, make_converter and make_converter())
+            for name, column, make_converter in self.mappers
+        ]
+        out = []
+        for row in rows:
+            item = {}
+            for name, column, convert in mappers:
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            out.append(item)
+        return out
+
+
+_mappers = {}
+
+
+def _column_mapper(model, name, field):
+    """(name, column, converter) for a serializer field backed by one column, else None."""
+    if field.source != name or '.' in field.source:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        # The serializer renders the related pk, which is the foreign key column.
+        return (name, model_field.attname, None) if model_field.many_to_one else None
+    if isinstance(field, (serializers.ModelSerializer, serializers.ListSerializer, serializers.RelatedField,
+                          serializers.ManyRelatedField, serializers.SerializerMethodField)):
+        return None
+    return name, model_field.attname, _converter_factory(field)
+
+
+def row_mapper(serializer):
+    """A RowMapper producing ``serializer``'s output, or None when it needs the serializer."""
+    fields = [(name, field) for name, field in serializer.fields.items() if not field.write_only]
+    key = (type(serializer), tuple((name, type(field)) for name, field in fields))
+    if key in _mappers:
+        return _mappers[key]
+
+    model = serializer.Meta.model
+    mappers = []
+    for name, field in fields:
+        mapper = _column_mapper(model, name, field)
+        if mapper is None:
+            _mappers[key] = None
+            return None
+        mappers.append(mapper)
+    _mappers[key] = RowMapper([column for _, column, _ in mappers], mappers)
+    return _mappers[key]
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer through orjson when it is installed, with the same bytes:
+    compact, UTF-8, U+2028/U+2029 escaped. Indented output and anything
+    orjson doesn't encode like the stdlib (datetimes and other types left to
+    DRF's encoder, out-of-range ints) go through JSONRenderer. Only for
+    responses without floats, whose exponent notation differs.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+                               default=_not_plain_json)
+        except (TypeError, orjson.JSONEncodeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer, for JavaScript contexts.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def _not_plain_json(obj):
+    raise TypeError
+
+
+class ValuesListMixin:
+    """
+    For read-only list views: ``list_page`` returns the page of the current
+    request and its serialized data, through .values() rows when the
+    serializer allows it (see ``row_mapper``).
+    """
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def list_page(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        mapper = row_mapper(self.get_serializer())  # With the request: ?fields= / ?expand= applied.
+        if mapper is None:
+            page = self.paginate_queryset(queryset)
+            return page, self.get_serializer(page, many=True).data
+        ordering = getattr(self.pagination_class, 'ordering', ())
+        page = self.paginate_queryset(queryset.values(*{*mapper.columns, *ordering}))
+        return page, mapper.map(page)
@@ -0,0 +1,150 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import ManyRelatedField
+
+# Sparse fieldsets and expansions
+#
+# On GET, ``?fields=id,title`` keeps only the listed fields of each object and
+# ``?omit=description`` drops fields; both take comma-separated names. The
+# serializer renders just those (SparseFieldsMixin) and the queryset loads
+# just their columns with only() (SparseQuerysetMixin), so a board that
+# needs id, title, status and assignee never reads the descriptions.
+#
+# ``?expand=assigned_to,project`` renders those relations as compact nested
+# objects instead of ids (ExpandFieldsMixin), loaded with the page through
+# select_related / prefetch_related (ExpandQuerysetMixin): the query count
+# doesn't depend on the page size and clients need no follow-up requests.
+#
+# The query string is part of the response cache key (core/cache.py), so
+# each shape is cached on its own.
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+EXPAND_PARAM = 'expand'
+
+
+def _names(value):
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fields(request, available):
+    """
+    The names among ``available`` (the readable fields of a serializer) that
+    ``request`` asks for, or None when it doesn't ask for a subset.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    fields = _names(request.query_params.get(FIELDS_PARAM))
+    omit = _names(request.query_params.get(OMIT_PARAM))
+    if fields is None and omit is None:
+        return None
+
+    unknown = ((fields or set()) | (omit or set())) - set(available)
+    if unknown:
+        raise ValidationError({FIELDS_PARAM: [f"Unknown field(s): {', '.join(sorted(unknown))}."]})
+    keep = (set(available) if fields is None else fields) - (omit or set())
+    if not keep:
+        raise ValidationError({FIELDS_PARAM: ["At least one field must be kept."]})
+    return keep
+
+
+def requested_expansions(request, expandable):
+    """The names among ``expandable`` that ``request`` asks to expand (empty when none)."""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return set()
+    expand = _names(request.query_params.get(EXPAND_PARAM)) or set()
+    unknown = expand - set(expandable)
+    if unknown:
+        raise ValidationError({EXPAND_PARAM: [f"Can't expand: {', '.join(sorted(unknown))}."]})
+    return expand
+
+
+def readable_fields(serializer):
+    return [name for name, field in serializer.fields.items() if not field.write_only]
+
+
+class SparseFieldsMixin:
+    """For serializers: render only the fields the request asks for (``?fields=`` / ``?omit=``)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = requested_fields(self.context.get('request'), readable_fields(self))
+        if keep is not None:
+            for name in readable_fields(self):
+                if name not in keep:
+                    self.fields.pop(name)
+
+
+class SparseQuerysetMixin:
+    """
+    For generic views whose serializer uses SparseFieldsMixin: load only the
+    columns behind the requested fields, plus the primary key and the
+    pagination ordering.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer_class()()  # Without the request: every field.
+        fields = serializer.fields
+        keep = requested_fields(self.request, readable_fields(serializer))
+        if keep is None:
+            return queryset
+
+        model = queryset.model
+        columns = {model._meta.pk.name, *getattr(self.pagination_class, 'ordering', ())}
+        for name in keep:
+            source = fields[name].source.split('.')[0]
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue  # A method or property: nothing to select.
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+        return queryset.only(*columns)
+
+
+class ExpandFieldsMixin:
+    """
+    For serializers with ``expandable_fields`` ({field name: compact
+    serializer class}): render the relations named in ``?expand=`` as nested
+    objects. A relation left out with ``?fields=`` / ``?omit=`` stays out.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in requested_expansions(self.context.get('request'), self.expandable_fields):
+            if name in self.fields:
+                many = isinstance(self.fields[name], ManyRelatedField)
+                self.fields[name] = self.expandable_fields[name](many=many, read_only=True)
+
+
+class ExpandQuerysetMixin:
+    """
+    For generic views whose serializer uses ExpandFieldsMixin: join the
+    expanded foreign keys (select_related) and prefetch the expanded
+    many-to-many relations, so each adds at most one query per request.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        expand = requested_expansions(self.request, serializer_class.expandable_fields)
+        if not expand:
+            return queryset
+
+        keep = requested_fields(self.request, readable_fields(serializer_class()))
+        for name in expand:
+            if keep is not None and name not in keep:
+                continue
+            model_field = queryset.model._meta.get_field(name)
+            if model_field.many_to_many:
+                summary_fields = serializer_class.expandable_fields[name].Meta.fields
+                related = model_field.related_model.objects.only(*summary_fields)
+                queryset = queryset.prefetch_related(Prefetch(name, queryset=related))
+            else:
+                queryset = queryset.select_related(name)
+        return queryset
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.fastpath import FastJSONRenderer, row_mapper
+from core.models import Project, Task, User
+from core.serializers import TaskSerializer
+
+
+class Command(BaseCommand):
+    help = ("Compare the per-row cost of TaskSerializer(many=True) with the .values() read path "
+            "(core/fastpath.py) on generated tasks; nothing is kept.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Tasks to generate.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per variant; the best one is reported.")
+
+    def best(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        with transaction.atomic():
+            user = User.objects.create_user(email='bench@example.invalid', name='Bench', role='ADMIN')
+            project = Project.objects.create(name='Serialization benchmark', created_by=user)
+            Task.objects.bulk_create(
+                Task(title=f"Task {n}", description="Lorem ipsum " * 20, project=project, created_by=user,
+                     assigned_to=user if n % 2 else None)
+                for n in range(rows)
+            )
+            queryset = Task.objects.filter(project=project).order_by('created_at', 'id')
+            mapper = row_mapper(TaskSerializer())
+
+            instances, fetched_rows = list(queryset), list(queryset.values(*mapper.columns))
+            variants = {
+                'serializer': lambda: TaskSerializer(list(queryset), many=True).data,
+                'values': lambda: mapper.map(queryset.values(*mapper.columns)),
+                # Without the query: what each costs per row once the rows are fetched.
+                'serialize only': lambda: TaskSerializer(instances, many=True).data,
+                'map only': lambda: mapper.map(fetched_rows),
+            }
+            results = {name: self.best(repeat, func) for name, func in variants.items()}
+            data = variants['serializer']()
+            results['render (json)'] = self.best(repeat, lambda: JSONRenderer().render(data))
+            results['render (fast)'] = self.best(repeat, lambda: FastJSONRenderer().render(data))
+            transaction.set_rollback(True)
+
+        for name, seconds in results.items():
+            self.stdout.write(f"{name:>14}: {seconds * 1000:8.1f} ms  {seconds / rows * 1e6:6.1f} us/row")
+        self.stdout.write(f"values path: {results['serializer'] / results['values']:.1f}x faster than the serializer "
+                          f"({results['serialize only'] / results['map only']:.1f}x without the query), "
+                          f"fast renderer {results['render (json)'] / results['render (fast)']:.1f}x faster")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db import database_sizes, run_maintenance
+
+
+def _format_size(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class Command(BaseCommand):
+    help = "Run SQLite maintenance: ANALYZE, PRAGMA optimize, WAL checkpoint and incremental vacuum."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help="Database alias to maintain.")
+        parser.add_argument('--checkpoint', default='TRUNCATE', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+                            help="WAL checkpoint mode.")
+        parser.add_argument('--vacuum-pages', type=int, default=0,
+                            help="Free pages released by the incremental vacuum (default: all).")
+        parser.add_argument('--full-vacuum', action='store_true',
+                            help="Rewrite the database with VACUUM and switch it to incremental auto_vacuum.")
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Database '{options['database']}' is not SQLite.")
+        if connection.in_atomic_block:
+            raise CommandError("Database maintenance cannot run inside a transaction.")
+
+        before = database_sizes(connection)
+        steps = run_maintenance(
+            connection, checkpoint=options['checkpoint'], vacuum_pages=options['vacuum_pages'],
+            full_vacuum=options['full_vacuum'],
+        )
+        after = database_sizes(connection)
+
+        for name, seconds, detail in steps:
+            self.stdout.write(f"{name:<20}{seconds * 1000:>10.1f} ms  {detail}".rstrip())
+        for key in before:
+            self.stdout.write(f"{key + ' size':<20}{_format_size(before[key]):>12} -> {_format_size(after[key])}")
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.report import export_progress_reports, export_queryset, iter_reports_zip
+from core.workers import process_pool
+
+
+class Command(BaseCommand):
+    help = "Write the progress reports of all (or the selected) projects into one ZIP file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_ids', nargs='*', type=int,
+                            help="Projects to export (default: all).")
+        parser.add_argument('--name', help="Only projects whose name contains this text.")
+        parser.add_argument('--output', '-o', default='progress_reports.zip',
+                            help="ZIP file to write.")
+        parser.add_argument('--processes', type=int, default=settings.REPORT_WORKER_PROCESSES,
+                            help="Worker processes rendering reports; 0 renders in this process.")
+
+    def handle(self, *args, **options):
+        project_ids = list(export_queryset(options['project_ids'], options['name']).values_list('pk', flat=True))
+        if not project_ids:
+            raise CommandError("No projects found.")
+
+        processes = options['processes']
+        pool = process_pool(processes)
+        try:
+            reports = export_progress_reports(project_ids, map=pool.map if pool else map)
+            with open(options['output'], 'wb') as output:
+                for chunk in iter_reports_zip(reports):
+                    output.write(chunk)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        self.stdout.write(f"Exported {len(project_ids)} report(s) to {options['output']}")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.progress import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-project task counters (ProjectProgress) from the task table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_ids', nargs='*', type=int,
+                            help="Projects to rebuild (default: all).")
+
+    def handle(self, *args, **options):
+        counters = rebuild_counters(options['project_ids'] or None)
+        self.stdout.write(f"Rebuilt counters for {len(counters)} project(s).")
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.report import claim_report_jobs, requeue_stale_report_jobs, run_report_job
+from core.workers import process_pool
+
+
+class Command(BaseCommand):
+    help = "Render queued progress reports (PDF) in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.REPORT_WORKER_PROCESSES,
+                            help="Worker processes rendering reports; 0 renders in this process.")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling for jobs instead of exiting once the queue is empty.")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to sleep between polls when the queue is empty (with --loop).")
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        pool = process_pool(processes)
+        run = pool.map if pool else map
+
+        try:
+            while True:
+                requeued = requeue_stale_report_jobs(settings.REPORT_JOB_TIMEOUT)
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stalled job(s)")
+
+                job_ids = claim_report_jobs(limit=max(processes, 1) * 2)
+                for job_id, state in run(run_report_job, job_ids):
+                    self.stdout.write(f"Report job {job_id}: {state}")
+                if job_ids:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            if pool:
+                pool.shutdown()
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.notify import deliver_pending_notifications
+
+
+class Command(BaseCommand):
+    help = "Deliver pending task notification e-mails from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.NOTIFICATION_BATCH_SIZE,
+                            help="Outbox rows sent per SMTP connection.")
+        parser.add_argument('--max-attempts', type=int, default=settings.NOTIFICATION_MAX_ATTEMPTS,
+                            help="Attempts before a notification is marked FAILED.")
+        parser.add_argument('--digest-window', type=int, default=settings.NOTIFICATION_DIGEST_WINDOW,
+                            help="Coalesce each tech lead's changes into one e-mail (seconds; 0 disables).")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling the outbox instead of exiting once it is drained.")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Seconds to sleep between polls when the outbox is empty (with --loop).")
+
+    def handle(self, *args, **options):
+        # Run a single worker: rows are not claimed, so two workers could send a row twice.
+        while True:
+            sent, retried, failed = deliver_pending_notifications(
+                batch_size=options['batch_size'], max_attempts=options['max_attempts'],
+                digest_window=options['digest_window'],
+            )
+            if sent or retried or failed:
+                self.stdout.write(f"Sent: {sent}, retrying: {retried}, failed: {failed}")
+                if not retried and not failed:
+                    continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
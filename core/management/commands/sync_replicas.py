@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database onto the read replicas (DATABASE_REPLICAS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*',
+                            help="Replica aliases to refresh (default: all).")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep refreshing instead of exiting after one copy.")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Seconds between copies (with --loop); bounds the replica lag.")
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        unknown = set(aliases) - set(settings.DATABASE_REPLICAS)
+        if unknown:
+            raise CommandError(f"Not a replica: {', '.join(sorted(unknown))}.")
+        if not aliases:
+            self.stdout.write("No replicas configured.")
+            return
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError("sync_replicas copies SQLite files; use the database's own replication.")
+        while True:
+            for alias in aliases:
+                start = time.perf_counter()
+                primary.ensure_connection()
+                connections[alias].ensure_connection()
+                # SQLite's online backup: a consistent snapshot, even while the primary takes writes.
+                primary.connection.backup(connections[alias].connection)
+                self.stdout.write(f"{alias}: copied in {(time.perf_counter() - start) * 1000:.1f} ms")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
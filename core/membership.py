@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Project
+from .routers import use_primary
+
+# Project membership
+#
+# "Is U a member of P" used to load every member of P to test one user. The
+# ids of the projects a user belongs to now come from one indexed lookup on
+# the members table, cached per user across requests (invalidated by
+# core/signals.py when memberships change) and memoized on the user object
+# for the rest of the request. The ids of the projects a user created are
+# kept the same way.
+
+MEMBERSHIP_KEY = 'membership:{}'
+CREATED_KEY = 'created:{}'
+
+
+def _cached_project_ids(user, memo, key, lookup):
+    """``lookup(user)`` gives the ids; cached under ``key`` and memoized as ``memo`` on the user."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    project_ids = getattr(user, memo, None)
+    if project_ids is None:
+        key = key.format(user.pk)
+        project_ids = cache.get(key)
+        if project_ids is None:
+            with use_primary():  # Cached across requests: never from a lagging replica.
+                project_ids = frozenset(lookup(user))
+            cache.set(key, project_ids)
+        setattr(user, memo, project_ids)
+    return project_ids
+
+
+def member_project_ids(user):
+    """Frozenset of the ids of the projects ``user`` is a member of."""
+    return _cached_project_ids(
+        user, '_member_project_ids', MEMBERSHIP_KEY,
+        lambda user: Project.members.through.objects.filter(user_id=user.pk).values_list('project_id', flat=True),
+    )
+
+
+def created_project_ids(user):
+    """Frozenset of the ids of the projects ``user`` created."""
+    return _cached_project_ids(
+        user, '_created_project_ids', CREATED_KEY,
+        lambda user: Project.objects.filter(created_by_id=user.pk).values_list('id', flat=True),
+    )
+
+
+def _project_id(project):
+    return project.pk if isinstance(project, Project) else project
+
+
+def is_project_member(user, project):
+    """``project`` is a Project or a project id."""
+    return _project_id(project) in member_project_ids(user)
+
+
+def has_project_access(user, project):
+    """Member or creator of ``project`` (a Project instance)."""
+    return project.created_by_id == user.pk or is_project_member(user, project)
+
+
+def _forget(key, user_ids):
+    cache.delete_many([key.format(pk) for pk in user_ids])
+
+
+def _invalidate(key, user_ids):
+    # Now and again on commit (see bump_generations) so a concurrent request can't re-cache the old set.
+    user_ids = {pk for pk in user_ids if pk is not None}
+    if user_ids:
+        _forget(key, user_ids)
+        transaction.on_commit(lambda: _forget(key, user_ids))
+
+
+def invalidate_memberships(*user_ids):
+    """Drop the cached member project ids of the given users."""
+    _invalidate(MEMBERSHIP_KEY, user_ids)
+
+
+def invalidate_created_projects(*user_ids):
+    """Drop the cached created project ids of the given users."""
+    _invalidate(CREATED_KEY, user_ids)
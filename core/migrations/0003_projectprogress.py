@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-17 06:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+POINTS = {'TODO': 0, 'IN_PROGRESS': 5, 'DONE': 10}
+
+
+def build_counters(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    Task = apps.get_model('core', 'Task')
+    ProjectProgress = apps.get_model('core', 'ProjectProgress')
+
+    counts = {
+        row['project']: row
+        for row in Task.objects.values('project').annotate(
+            todo=Count('id', filter=Q(status='TODO')),
+            in_progress=Count('id', filter=Q(status='IN_PROGRESS')),
+            done=Count('id', filter=Q(status='DONE')),
+        )
+    }
+    ProjectProgress.objects.bulk_create([
+        ProjectProgress(
+            project_id=project_id,
+            todo=counts.get(project_id, {}).get('todo', 0),
+            in_progress=counts.get(project_id, {}).get('in_progress', 0),
+            done=counts.get(project_id, {}).get('done', 0),
+            total_points=sum(
+                counts.get(project_id, {}).get(field, 0) * POINTS[task_status]
+                for task_status, field in [('TODO', 'todo'), ('IN_PROGRESS', 'in_progress'), ('DONE', 'done')]
+            ),
+        )
+        for project_id in Project.objects.values_list('id', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectProgress',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress', serialize=False, to='core.project')),
+                ('todo', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+                ('total_points', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
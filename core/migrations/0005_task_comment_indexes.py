@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-17 07:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicate_titles(apps, schema_editor):
+    """
+    Make (project, title) unique before the constraint goes on: the oldest
+    task keeps its title, later ones get a " (2)", " (3)", ... suffix.
+    """
+    Task = apps.get_model('core', 'Task')
+    duplicates = (
+        Task.objects.values('project_id', 'title').annotate(n=Count('id')).filter(n__gt=1)
+    )
+    for row in duplicates:
+        taken = set(Task.objects.filter(project_id=row['project_id']).values_list('title', flat=True))
+        tasks = Task.objects.filter(project_id=row['project_id'], title=row['title']).order_by('id')[1:]
+        suffix = 2
+        for task in tasks:
+            while True:
+                tail = f" ({suffix})"
+                title = row['title'][:255 - len(tail)] + tail
+                suffix += 1
+                if title not in taken:
+                    break
+            taken.add(title)
+            Task.objects.filter(pk=task.pk).update(title=title)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['task', 'created_at'], name='comment_task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['project', 'created_at'], name='comment_project_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+        ),
+        migrations.RunPython(rename_duplicate_titles, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('project', 'title'), name='unique_task_title_per_project'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-17 07:24
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_content_digests(apps, schema_editor):
+    """
+    Fill in `content_digest` for existing comments. When an author posted the
+    same (stripped) content on a task more than once, the oldest comment gets
+    the plain digest and the later ones "<digest>#<id>", so no row is lost
+    and the constraint can go on.
+    """
+    Comment = apps.get_model('core', 'Comment')
+    seen = set()
+    batch = []
+    for comment in Comment.objects.only('id', 'content', 'created_by_id', 'task_id').order_by('id').iterator():
+        digest = hashlib.sha256(comment.content.strip().encode()).hexdigest()
+        key = (comment.created_by_id, comment.task_id, digest)
+        if comment.task_id is not None and key in seen:
+            digest = f"{digest}#{comment.id}"
+        seen.add(key)
+        comment.content_digest = digest
+        batch.append(comment)
+        if len(batch) == 1000:
+            Comment.objects.bulk_update(batch, ['content_digest'])
+            batch = []
+    Comment.objects.bulk_update(batch, ['content_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_task_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='content_digest',
+            field=models.CharField(default='', editable=False, max_length=80),
+        ),
+        migrations.RunPython(backfill_content_digests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='comment',
+            constraint=models.UniqueConstraint(fields=('created_by', 'task', 'content_digest'), name='unique_comment_per_author_task'),
+        ),
+    ]
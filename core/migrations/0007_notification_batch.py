@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_comment_content_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='batch',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,5 +1,9 @@
+import hashlib
+import uuid
+
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 ROLES = [
     ('ADMIN', 'Admin'),
@@ -50,6 +54,8 @@ class Project(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_projects')
     members = models.ManyToManyField(User, related_name='projects')  
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also moved by membership changes (core/signals.py); validator of conditional GETs (core/conditional.py).
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -68,19 +74,158 @@ class Task(models.Model):
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     created_by = models.ForeignKey(User, related_name='created_tasks', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Writes that bypass save() (core/bulk.py) set it themselves; see core/conditional.py.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'title'], name='unique_task_title_per_project'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    # Atomic so the ProjectProgress counters updated by the save/delete
+    # signals commit or roll back together with the task row.
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+def comment_digest(content):
+    """SHA-256 of the comment text with surrounding whitespace stripped."""
+    return hashlib.sha256(content.strip().encode()).hexdigest()
+
 
 class Comment(models.Model):
     content = models.TextField()
+    # Indexed stand-in for `content` in the duplicate check; see save().
+    content_digest = models.CharField(max_length=80, editable=False, default='')
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='comments', null=True, blank=True)
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='comments', null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'created_at'], name='comment_task_created_idx'),
+            models.Index(fields=['project', 'created_at'], name='comment_project_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['created_by', 'task', 'content_digest'], name='unique_comment_per_author_task',
+            ),
+        ]
+
+
+    def save(self, *args, **kwargs):
+        digest = comment_digest(self.content)
+        # Duplicates that predate the constraint keep a "<digest>#<id>" value
+        # (migration 0006) until their content is edited.
+        if not self.content_digest.startswith(digest):
+            self.content_digest = digest
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content_digest' not in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'content_digest'}
+        super().save(*args, **kwargs)
+
 
     def __str__(self):
         return f"Comment by {self.created_by} on {self.created_at}"
+
+
+class Notification(models.Model):
+    """
+    Outbox row for a task status e-mail to the project's tech leads.
+    Written in the same transaction as the task change and delivered later by
+    `python manage.py send_notifications`.
+    """
+    PENDING = 'PENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='notifications')
+    task = models.ForeignKey(Task, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications')
+    task_title = models.CharField(max_length=255)
+    task_status = models.CharField(max_length=50)
+    updated_by = models.CharField(max_length=255, blank=True)
+    # Rows enqueued together (a batch of status changes) go out as one e-mail per project.
+    batch = models.UUIDField(null=True, blank=True, editable=False)
+
+    state = models.CharField(max_length=10, choices=[
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ], default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['state', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.task_title} -> {self.task_status} ({self.state})"
+
+
+class ProjectProgress(models.Model):
+    """
+    Denormalized task counters of a project, so progress is a primary-key
+    read. Kept in step with Task writes by core/signals.py; repair with
+    `python manage.py rebuild_counters`.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='progress')
+    todo = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    total_points = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Progress of {self.project_id}"
+
+
+class ReportJob(models.Model):
+    """
+    A progress report rendered in the background by
+    `python manage.py run_report_jobs`. ``file`` is the storage name of the
+    artifact for the project's content version at request time.
+    """
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='report_jobs')
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs')
+    format = models.CharField(max_length=10, default='pdf')
+    version = models.CharField(max_length=64)
+    file = models.CharField(max_length=255)
+
+    state = models.CharField(max_length=10, choices=[
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ], default=PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['state', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.format} report of {self.project_id} ({self.state})"
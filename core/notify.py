@@ -1,80 +1,287 @@
-from django.core.mail import send_mail
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
+from django.utils import timezone
 from django.utils.html import strip_tags
 
+from .models import Notification, Project
+
 # email notify
 
-def notify_tech_lead_on_task_update(task):
-    project = task.project
-    subject = f"Attention!!! Task Update {task.title} status changed"
+def build_task_update_email(project_name, task_title, task_status, updated_by):
+    """Return (subject, message, html_message) for a task status change."""
+    subject = f"Attention!!! Task Update {task_title} status changed"
     message = f"""
     Hello Tech Lead,
 
 
-    A task has been updated in project {project.name}:
+    A task has been updated in project {project_name}:
 
 
-    Project: {project.name}
-    Task: {task.title}
-    New Status: {task.status}
-    Updated By: {task.assigned_to.name if task.assigned_to else "Unknown"}
+    Project: {project_name}
+    Task: {task_title}
+    New Status: {task_status}
+    Updated By: {updated_by or "Unknown"}
 
 
     Please check the update progress.
 
 
     Regards,
-    {task.assigned_to.name if task.assigned_to else "Senior Dev"}    
+    {updated_by or "Senior Dev"}
     Dev Team,
-    {project.name}
+    {project_name}
     """
-   
+
     html_message = f"""
     <html>
     <body>
         <p>Hello Tech Lead,</p>
-        <p>A task has been updated in project <strong>{project.name}</strong>:</p>
-        <p><strong>Project:</strong> {project.name}<br>
-        <strong>Task:</strong> {task.title}<br>
-        <strong>New Status:</strong> <span style="background-color: yellow; padding: 2px 5px; font-weight: bold;">{task.status}</span><br>
-        <strong>Updated By:</strong> {task.assigned_to.name if task.assigned_to else "Unknown"}</p>
+        <p>A task has been updated in project <strong>{project_name}</strong>:</p>
+        <p><strong>Project:</strong> {project_name}<br>
+        <strong>Task:</strong> {task_title}<br>
+        <strong>New Status:</strong> <span style="background-color: yellow; padding: 2px 5px; font-weight: bold;">{task_status}</span><br>
+        <strong>Updated By:</strong> {updated_by or "Unknown"}</p>
         <p>Please review the update.</p>
-        <p>Regards,<br>Dev Team,<br>{project.name}</p>
+        <p>Regards,<br>Dev Team,<br>{project_name}</p>
     </body>
     </html>
     """
+    return subject, message, html_message
+
+
+def build_digest_email(changes):
+    """
+    Return (subject, message, html_message) listing several task status
+    changes. ``changes`` are outbox rows, already reduced to the last change
+    per task.
+    """
+    subject = f"Attention!!! {len(changes)} task updates"
+    lines = [
+        f"    - [{n.project.name}] {n.task_title}: {n.task_status} (by {n.updated_by or 'Unknown'})"
+        for n in changes
+    ]
+    rows = "".join(
+        f"<tr><td>{n.project.name}</td><td>{n.task_title}</td>"
+        f"<td><strong>{n.task_status}</strong></td><td>{n.updated_by or 'Unknown'}</td></tr>"
+        for n in changes
+    )
+    message = f"""
+    Hello Tech Lead,
 
 
-    # Filter only TECH_LEAD users in the project
-    tech_leads = project.members.filter(role='TECH_LEAD')
-    recipient_list = [user.email for user in tech_leads]
+    The following tasks have been updated:
 
-    print(f"Tech leads to notify: {recipient_list}")
 
+{chr(10).join(lines)}
 
-    if recipient_list:
-        try:
-            print("Attempting to send email...")
-            email_sent = send_mail(
-                subject,
-                strip_tags(message), 
-                settings.DEFAULT_FROM_EMAIL,
-                recipient_list,
-                fail_silently=False,
-                html_message=html_message  
-            )
-           
-            # Check if the email was sent successfully
-            if email_sent:
-                print(f"Email successfully sent to: {', '.join(recipient_list)}")
-            else:
-                print(f"Email was not sent to any recipients: {', '.join(recipient_list)}")
-               
-        except Exception as e:
-            print(f"Error sending email to tech lead for task '{task.title}' in project '{project.name}': {e}")
+
+    Please check the update progress.
+
+
+    Regards,
+    Dev Team
+    """
+
+    html_message = f"""
+    <html>
+    <body>
+        <p>Hello Tech Lead,</p>
+        <p>The following tasks have been updated:</p>
+        <table cellpadding="4">
+            <tr><th>Project</th><th>Task</th><th>New Status</th><th>Updated By</th></tr>
+            {rows}
+        </table>
+        <p>Please review the updates.</p>
+        <p>Regards,<br>Dev Team</p>
+    </body>
+    </html>
+    """
+    return subject, message, html_message
+
+
+def enqueue_task_update(task, updated_by):
+    """
+    Record a task status e-mail in the outbox; ``updated_by`` is the name of
+    the user who made the change. Call it inside the transaction that saves
+    the task: it is a single INSERT, and the e-mail goes out only if the task
+    change commits.
+
+    In digest mode (NOTIFICATION_DIGEST_WINDOW > 0) the row is held back for
+    the window so later changes can be coalesced into the same e-mail.
+    """
+    return Notification.objects.create(
+        project_id=task.project_id,
+        task=task,
+        task_title=task.title,
+        task_status=task.status,
+        updated_by=updated_by,
+        next_attempt_at=timezone.now() + timedelta(seconds=settings.NOTIFICATION_DIGEST_WINDOW),
+    )
+
+
+def enqueue_task_updates(tasks, updated_by):
+    """
+    Record the status e-mails of several tasks changed together, in one
+    INSERT. The rows share a batch id, so each project's tech leads get a
+    single e-mail listing all the changes. Call it inside the transaction
+    that changes the tasks.
+    """
+    batch = uuid.uuid4()
+    next_attempt_at = timezone.now() + timedelta(seconds=settings.NOTIFICATION_DIGEST_WINDOW)
+    return Notification.objects.bulk_create([
+        Notification(
+            project_id=task.project_id, task=task, task_title=task.title, task_status=task.status,
+            updated_by=updated_by, batch=batch, next_attempt_at=next_attempt_at,
+        )
+        for task in tasks
+    ])
+
+
+def tech_lead_emails(project_ids):
+    """{project_id: [email, ...]} for the tech leads of the given projects, in one query."""
+    recipients = defaultdict(list)
+    rows = Project.members.through.objects.filter(
+        project_id__in=project_ids, user__role='TECH_LEAD', user__is_active=True
+    ).values_list('project_id', 'user__email')
+    for project_id, email in rows:
+        recipients[project_id].append(email)
+    return recipients
+
+
+def _single_messages(batch, recipients):
+    """
+    One e-mail per outbox row, to every tech lead of its project; rows
+    enqueued together are listed in one e-mail per project.
+    """
+    groups = defaultdict(list)
+    for notification in batch:
+        key = (notification.project_id, notification.batch) if notification.batch else notification.id
+        groups[key].append(notification)
+    for notifications in groups.values():
+        recipient_list = recipients.get(notifications[0].project_id)
+        if not recipient_list:
+            continue
+        if len(notifications) == 1:
+            n = notifications[0]
+            content = build_task_update_email(n.project.name, n.task_title, n.task_status, n.updated_by)
+        else:
+            content = build_digest_email(notifications)
+        yield recipient_list, content, notifications
+
+
+def _digest_messages(batch, recipients):
+    """One e-mail per tech lead covering all their rows; the last status per task wins."""
+    by_recipient = defaultdict(dict)
+    covered = defaultdict(list)
+    for notification in batch:
+        # Rows of a deleted task have no task_id; fall back to the title.
+        key = notification.task_id or (notification.project_id, notification.task_title)
+        for email in recipients.get(notification.project_id, ()):
+            by_recipient[email][key] = notification
+            covered[email].append(notification)
+
+    for email, latest in by_recipient.items():
+        changes = list(latest.values())
+        if len(changes) == 1:
+            n = changes[0]
+            content = build_task_update_email(n.project.name, n.task_title, n.task_status, n.updated_by)
+        else:
+            content = build_digest_email(changes)
+        yield [email], content, covered[email]
+
+
+def deliver_pending_notifications(batch_size=None, max_attempts=None, backoff=None, digest_window=None):
+    """
+    Send one batch of due outbox rows over a single SMTP connection.
+
+    With a digest window, every pending row of the projects in the batch is
+    pulled in (even if its window has not elapsed yet) and each tech lead
+    gets a single e-mail listing the changes. Without one, rows enqueued
+    together (enqueue_task_updates) still go out as one e-mail per project.
+
+    Failed rows are retried with exponential backoff (``backoff`` seconds,
+    doubled per attempt, capped at an hour) and marked FAILED after
+    ``max_attempts``. A digest row shared by several tech leads is retried if
+    any of their e-mails failed. Returns (sent, retried, failed).
+    """
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    max_attempts = max_attempts or settings.NOTIFICATION_MAX_ATTEMPTS
+    backoff = backoff or settings.NOTIFICATION_RETRY_BACKOFF
+    if digest_window is None:
+        digest_window = settings.NOTIFICATION_DIGEST_WINDOW
+
+    now = timezone.now()
+    pending = Notification.objects.filter(state=Notification.PENDING).select_related('project').order_by('id')
+    batch = list(pending.filter(next_attempt_at__lte=now)[:batch_size])
+    if not batch:
+        return 0, 0, 0
+
+    project_ids = {n.project_id for n in batch}
+    due_ids = {n.id for n in batch}
+    # Only rows not already failing join early: a retried row keeps its backoff.
+    if digest_window:
+        batch += list(pending.filter(project_id__in=project_ids, attempts=0).exclude(id__in=due_ids)[:batch_size])
     else:
-        print("No tech leads found for this project.")
+        # The rest of a batch cut off by batch_size, so it still goes out as one e-mail.
+        batch_ids = {n.batch for n in batch if n.batch}
+        if batch_ids:
+            batch += list(pending.filter(batch__in=batch_ids, attempts=0).exclude(id__in=due_ids))
+    batch.sort(key=lambda n: n.id)
+    recipients = tech_lead_emails(project_ids)
+
+    failures = {}
 
+    def record_failure(notification, error):
+        failures[notification.id] = (notification, error)
 
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for notification in batch:
+            record_failure(notification, e)
+    else:
+        try:
+            messages = _digest_messages if digest_window else _single_messages
+            for recipient_list, (subject, message, html_message), notifications in messages(batch, recipients):
+                email = EmailMultiAlternatives(
+                    subject, strip_tags(message), settings.DEFAULT_FROM_EMAIL, recipient_list,
+                    connection=connection,
+                )
+                email.attach_alternative(html_message, 'text/html')
+                try:
+                    connection.send_messages([email])
+                except Exception as e:
+                    for notification in notifications:
+                        record_failure(notification, e)
+        finally:
+            connection.close()
 
+    sent, retried, failed = [], [], []
+    for notification in batch:
+        notification.attempts += 1
+        if notification.id in failures:
+            notification.last_error = str(failures[notification.id][1])
+            if notification.attempts >= max_attempts:
+                notification.state = Notification.FAILED
+                failed.append(notification)
+            else:
+                delay = min(backoff * 2 ** (notification.attempts - 1), 3600)
+                notification.next_attempt_at = now + timedelta(seconds=delay)
+                retried.append(notification)
+        else:
+            if not recipients.get(notification.project_id):
+                # Nothing to deliver; don't keep the row pending forever.
+                notification.last_error = "No tech leads found for this project."
+            notification.state = Notification.SENT
+            notification.sent_at = timezone.now()
+            sent.append(notification)
 
+    Notification.objects.bulk_update(
+        batch, ['state', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'],
+    )
+    return len(sent), len(retried), len(failed)
@@ -0,0 +1,139 @@
+import base64
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor pagination ordered on (created_at, id).
+
+    Each page is fetched with a range condition on the last seen position, so
+    there is no COUNT(*) and no OFFSET scan however deep the client pages.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('created_at', 'id')
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 10
+        max_page_size = getattr(settings, 'KEYSET_PAGINATION_MAX_PAGE_SIZE', 100)
+
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                page_size = int(requested)
+            except ValueError:
+                pass
+        return max(1, min(page_size, max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        time_field, id_field = self.ordering
+        reverse = self.cursor is not None and self.cursor[2]
+
+        if reverse:
+            queryset = queryset.order_by(f'-{time_field}', f'-{id_field}')
+        else:
+            queryset = queryset.order_by(time_field, id_field)
+
+        if self.cursor is not None:
+            created_at, pk, _ = self.cursor
+            op = 'lt' if reverse else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{time_field}__{op}': created_at}) |
+                Q(**{time_field: created_at, f'{id_field}__{op}': pk})
+            )
+
+        # Fetch one extra row to learn whether another page exists.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_position = None
+        self.previous_position = None
+        if results:
+            # Walking backwards always leaves a later page behind us; walking
+            # forwards from a cursor always leaves an earlier one.
+            if reverse:
+                self.next_position = self._position(results[-1])
+                if has_more:
+                    self.previous_position = self._position(results[0])
+            else:
+                if has_more:
+                    self.next_position = self._position(results[-1])
+                if self.cursor is not None:
+                    self.previous_position = self._position(results[0])
+
+        self.page = results
+        return results
+
+    def _position(self, obj):
+        time_field, id_field = self.ordering
+        if isinstance(obj, dict):  # A .values() row (core/fastpath.py)
+            return obj[time_field], obj[id_field]
+        return getattr(obj, time_field), getattr(obj, id_field)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            created_at, pk, reverse = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            created_at = datetime.fromisoformat(created_at)
+            if settings.USE_TZ and timezone.is_naive(created_at):
+                # Our cursors carry an offset; read a hand-made one as UTC, not the server's zone.
+                created_at = timezone.make_aware(created_at, dt_timezone.utc)
+            return created_at, int(pk), bool(reverse)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        created_at, pk = position
+        payload = json.dumps([created_at.isoformat(), pk, int(reverse)], separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
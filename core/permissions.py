@@ -1,7 +1,9 @@
-from rest_framework.permissions import BasePermission, SAFE_METHODS
+from rest_framework.permissions import BasePermission
 from rest_framework import generics, permissions
 from rest_framework.permissions import BasePermission
 from .models import Task, Comment
+from .membership import has_project_access, is_project_member
+from .policy import is_allowed
 from .serializers import TaskSerializer
 
 
@@ -28,16 +30,8 @@ class IsAdminOrProjectAccess(BasePermission):
         if not user.is_authenticated:
             return False
 
-        # Admin users can access all projects
-        if user.role == 'ADMIN':
-            return True
-
-        # Allow read-only methods for Project Leads, Developers, and Clients assigned to the project
-        if request.method in SAFE_METHODS:
-            return user in obj.members.all() or obj.created_by == user
-
-        # Only creator (typically PM) or user assigned to project can modify the project
-        return obj.created_by == user or user in obj.members.all()
+        # Same rule for reads and writes; see ('project', 'view') in core/policy.py
+        return is_allowed(user, 'view', obj)
 
 
 class IsProjectManagerOrAdmin(BasePermission):
@@ -56,7 +50,7 @@ class IsProjectLeadOrAssigned(BasePermission):
     """
     def has_permission(self, request, view):
         project = view.get_object()
-        return request.user in project.members.all() or request.user == project.created_by
+        return has_project_access(request.user, project)
 
 
 class IsDeveloperAssigned(BasePermission):
@@ -65,7 +59,7 @@ class IsDeveloperAssigned(BasePermission):
     """
     def has_permission(self, request, view):
         project = view.get_object()
-        return request.user in project.members.all()
+        return is_project_member(request.user, project)
 
 
 class IsClientAssigned(BasePermission):
@@ -74,7 +68,7 @@ class IsClientAssigned(BasePermission):
     """
     def has_permission(self, request, view):
         project = view.get_object()
-        return request.user in project.members.all()
+        return is_project_member(request.user, project)
 
 
 from rest_framework.permissions import BasePermission
@@ -89,7 +83,7 @@ class IsTechLeadAssigned(BasePermission):
         if isinstance(view.get_object(), Comment):
             comment = view.get_object()
             # Check if the user is either the creator or assigned to the project or task related to the comment
-            return request.user == comment.created_by or request.user in comment.project.members.all()
+            return request.user == comment.created_by or is_project_member(request.user, comment.project_id)
         return False
 
 
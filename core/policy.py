@@ -0,0 +1,206 @@
+from django.db.models import Q
+from django.http import Http404
+from rest_framework.exceptions import PermissionDenied
+
+from .membership import member_project_ids
+from .models import Comment, Project, Task
+
+# Role policy
+#
+# POLICY maps (resource, action) to the rule of each role. A rule is a tuple
+# of condition names that a row must all meet; ANY allows every row and a
+# role that is not listed is denied. Rules compile into queryset filters, so
+# listing and object lookup are authorized in the same SQL query as the
+# fetch, and into one query for a batch check.
+
+ANY = ()
+
+RESOURCES = {
+    'project': Project,
+    'task': Task,
+    'comment': Comment,
+}
+
+# Condition name -> Q for the requesting user, per resource. Membership comes
+# from the cached project ids (core/membership.py), not a join.
+CONDITIONS = {
+    'project': {
+        'member_or_creator': lambda user: Q(pk__in=member_project_ids(user)) | Q(created_by=user),
+        'member': lambda user: Q(pk__in=member_project_ids(user)),
+    },
+    'task': {
+        'project_member': lambda user: Q(project_id__in=member_project_ids(user)),
+        'assignee': lambda user: Q(assigned_to=user),
+    },
+    'comment': {
+        'project_member': lambda user: Q(project_id__in=member_project_ids(user)),
+        'project_creator': lambda user: Q(project__created_by=user),
+        'task_assignee': lambda user: Q(task__assigned_to=user),
+        'author': lambda user: Q(created_by=user),
+    },
+}
+
+_COMMENT_WRITE = {
+    'ADMIN': ANY,
+    'PROJECT_MANAGER': ('project_creator',),
+    'TECH_LEAD': ('project_member',),
+    'DEVELOPER': ('author', 'project_member'),
+    'CLIENT': ('project_member',),
+}
+
+POLICY = {
+    ('project', 'view'): {
+        'ADMIN': ANY,
+        'PROJECT_MANAGER': ('member_or_creator',),
+        'TECH_LEAD': ('member_or_creator',),
+        'DEVELOPER': ('member_or_creator',),
+        'CLIENT': ('member_or_creator',),
+    },
+    ('project', 'update'): {
+        'ADMIN': ANY,
+        'PROJECT_MANAGER': ('member',),
+    },
+    ('project', 'delete'): {
+        'ADMIN': ANY,
+        'PROJECT_MANAGER': ('member_or_creator',),
+        'TECH_LEAD': ('member_or_creator',),
+        'DEVELOPER': ('member_or_creator',),
+        'CLIENT': ('member_or_creator',),
+    },
+    ('task', 'view'): {
+        'ADMIN': ANY,
+        'PROJECT_MANAGER': ('project_member',),
+        'TECH_LEAD': ('project_member',),
+        'DEVELOPER': ('project_member',),
+        'CLIENT': ('project_member',),
+    },
+    ('task', 'update'): {
+        'ADMIN': ANY,
+        'PROJECT_MANAGER': ANY,
+        'TECH_LEAD': ANY,
+        'DEVELOPER': ('assignee',),
+    },
+    ('task', 'update_status'): {
+        'DEVELOPER': ('assignee',),
+    },
+    ('task', 'delete'): {
+        'ADMIN': ANY,
+        'PROJECT_MANAGER': ANY,
+        'TECH_LEAD': ANY,
+    },
+    ('comment', 'view'): {
+        'ADMIN': ANY,
+        'PROJECT_MANAGER': ('project_creator',),
+        'TECH_LEAD': ('project_member',),
+        'DEVELOPER': ('task_assignee',),
+        'CLIENT': ('project_member',),
+    },
+    ('comment', 'update'): _COMMENT_WRITE,
+    ('comment', 'delete'): _COMMENT_WRITE,
+}
+
+# Message of a 403 for an existing row the rule filtered out; {action} is the action name.
+DENIED_MESSAGES = {
+    ('task', 'update'): "You do not have permission to update this task.",
+    ('task', 'update_status'): "You can only update the status of tasks assigned to you.",
+    ('task', 'delete'): "You do not have permission to delete this task.",
+    ('comment', 'PROJECT_MANAGER'): "Project Managers can only {action} comments on their own projects.",
+    ('comment', 'TECH_LEAD'): "Tech Leads can only {action} comments from their assigned projects.",
+    ('comment', 'DEVELOPER'): "Developers can only {action} their own comments on projects they are assigned to.",
+    ('comment', 'CLIENT'): "Clients can only {action} comments from their assigned projects.",
+    ('comment', None): "Your role is not allowed to {action} comments.",
+}
+
+
+def compile_rule(user, resource, action):
+    """
+    The filter for what ``user`` may ``action`` on ``resource``: a Q (empty
+    when every row is allowed), or None when no row is.
+    """
+    rule = POLICY[(resource, action)].get(user.role)
+    if rule is None:
+        return None
+    conditions = CONDITIONS[resource]
+    q = Q()
+    for name in rule:
+        q &= conditions[name](user)
+    return q
+
+
+def authorized(queryset, user, action):
+    """``queryset`` narrowed to the rows ``user`` may ``action``."""
+    q = compile_rule(user, _resource(queryset.model), action)
+    if q is None:
+        return queryset.none()
+    return queryset.filter(q) if q else queryset
+
+
+def allowed_ids(user, action, resource, ids):
+    """
+    Batch check: the subset of ``ids`` (existing primary keys of
+    ``resource``) that ``user`` may ``action``, in at most one query.
+    """
+    ids = set(ids)
+    if not ids:
+        return set()
+    queryset = authorized(RESOURCES[resource].objects.filter(pk__in=ids), user, action)
+    return set(queryset.values_list('pk', flat=True))
+
+
+def is_allowed(user, action, obj):
+    """``allowed_ids`` for one loaded object; no query when the role alone decides."""
+    resource = _resource(type(obj))
+    q = compile_rule(user, resource, action)
+    if q is None:
+        return False
+    if not q:
+        return True
+    return obj.pk in allowed_ids(user, action, resource, [obj.pk])
+
+
+def denied_message(user, resource, action):
+    message = DENIED_MESSAGES.get((resource, action))
+    if message is None:
+        role = user.role if user.role in POLICY[(resource, action)] else None
+        message = DENIED_MESSAGES.get((resource, role))
+    return message.format(action=action) if message else PermissionDenied.default_detail
+
+
+def _resource(model):
+    for name, resource_model in RESOURCES.items():
+        if issubclass(model, resource_model):
+            return name
+    raise LookupError(f"No policy for {model.__name__}.")
+
+
+class PolicyObjectMixin:
+    """
+    For generic views: the object is fetched through ``authorized`` for
+    ``policy_action``, so lookup and permission check are one query. Only
+    when that finds nothing is the row's existence checked, to answer 403
+    rather than 404 for a row the user may not touch.
+    """
+    policy_action = None
+
+    def get_policy_action(self):
+        return self.policy_action
+
+    def get_object(self):
+        user = self.request.user
+        action = self.get_policy_action()
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        assert lookup_url_kwarg in self.kwargs, (
+            f'Expected view {self.__class__.__name__} to be called with a URL keyword argument '
+            f'named "{lookup_url_kwarg}".'
+        )
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+        obj = authorized(queryset, user, action).filter(**filter_kwargs).first()
+        if obj is None:
+            if queryset.filter(**filter_kwargs).exists():
+                raise PermissionDenied(denied_message(user, _resource(queryset.model), action))
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,150 @@
+from collections import defaultdict
+
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .cache import bump_generations, project_scope
+from .models import Project, ProjectProgress, Task
+from .routers import use_primary
+
+# Task points based on status
+TASK_POINTS = {
+    'TODO': 0,
+    'IN_PROGRESS': 5,
+    'DONE': 10,
+}
+
+# ProjectProgress counter column for each task status
+STATUS_FIELDS = {
+    'TODO': 'todo',
+    'IN_PROGRESS': 'in_progress',
+    'DONE': 'done',
+}
+
+
+def _points():
+    return Case(
+        *[When(status=task_status, then=Value(value)) for task_status, value in TASK_POINTS.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _aggregates():
+    return {
+        'todo': Count('id', filter=Q(status='TODO')),
+        'in_progress': Count('id', filter=Q(status='IN_PROGRESS')),
+        'done': Count('id', filter=Q(status='DONE')),
+        'total_points': Coalesce(Sum(_points()), 0),
+    }
+
+
+def _summary(todo, in_progress, done, total_points):
+    return {
+        'total_tasks': todo + in_progress + done,
+        'done': done,
+        'in_progress': in_progress,
+        'todo': todo,
+        'total_points': total_points,
+    }
+
+
+def project_summary(project):
+    """
+    Task counts per status and total points for a project: a primary-key
+    read of its ProjectProgress row, rebuilt from the tasks if it is missing.
+    """
+    progress = ProjectProgress.objects.filter(pk=project.pk).first()
+    if progress is None:
+        progress = rebuild_counters([project.pk]).get(project.pk)
+    if progress is None:
+        return _summary(0, 0, 0, 0)
+    return _summary(progress.todo, progress.in_progress, progress.done, progress.total_points)
+
+
+def project_summaries(project_ids):
+    """
+    {project_id: summary} for many projects: one read of their counter rows,
+    plus one grouped rebuild for any that are missing.
+    """
+    rows = ProjectProgress.objects.in_bulk(project_ids)
+    missing = [pk for pk in project_ids if pk not in rows]
+    if missing:
+        rows.update(rebuild_counters(missing))
+    return {
+        pk: _summary(progress.todo, progress.in_progress, progress.done, progress.total_points)
+        for pk, progress in rows.items()
+    }
+
+
+def project_progress(summary):
+    """Progress on a scale of 0 to 100."""
+    if summary['total_tasks'] > 0:
+        return (summary['total_points'] / (summary['total_tasks'] * 10)) * 100
+    return 0
+
+
+def adjust_counters(project_id, task_status, delta):
+    """
+    Add ``delta`` tasks of ``task_status`` to a project's counters with a
+    single UPDATE. A missing row is left alone; it is rebuilt from the task
+    table the next time it is read.
+    """
+    field = STATUS_FIELDS.get(task_status)
+    if project_id is None or field is None:
+        return
+    ProjectProgress.objects.filter(pk=project_id).update(**{
+        field: F(field) + delta,
+        'total_points': F('total_points') + delta * TASK_POINTS[task_status],
+    })
+
+
+def apply_counter_deltas(deltas):
+    """
+    Batch form of ``adjust_counters``: apply {(project_id, task_status): delta}
+    with one UPDATE per project.
+    """
+    by_project = defaultdict(dict)
+    for (project_id, task_status), delta in deltas.items():
+        if delta and project_id is not None and task_status in STATUS_FIELDS:
+            by_project[project_id][task_status] = delta
+    for project_id, changes in by_project.items():
+        update = {STATUS_FIELDS[s]: F(STATUS_FIELDS[s]) + delta for s, delta in changes.items()}
+        update['total_points'] = F('total_points') + sum(delta * TASK_POINTS[s] for s, delta in changes.items())
+        ProjectProgress.objects.filter(pk=project_id).update(**update)
+
+
+def rebuild_counters(project_ids=None):
+    """
+    Recompute the counters of the given projects (all when None) from the
+    task table with one grouped query and upsert them. Returns
+    {project_id: ProjectProgress}.
+    """
+    projects = Project.objects.all()
+    if project_ids is not None:
+        projects = projects.filter(pk__in=project_ids)
+
+    counters = {}
+    with use_primary():  # The counters are written back; count the primary's rows.
+        rows = {
+            row['project']: row
+            for row in Task.objects.filter(project__in=projects).values('project').annotate(**_aggregates())
+        }
+        for project_id in projects.values_list('pk', flat=True):
+            row = rows.get(project_id, {})
+            counters[project_id] = ProjectProgress(
+                project_id=project_id,
+                todo=row.get('todo', 0),
+                in_progress=row.get('in_progress', 0),
+                done=row.get('done', 0),
+                total_points=row.get('total_points', 0),
+            )
+    ProjectProgress.objects.bulk_create(
+        counters.values(),
+        update_conflicts=True,
+        unique_fields=['project'],
+        update_fields=['todo', 'in_progress', 'done', 'total_points'],
+    )
+    # Repaired counters change the reports built on them.
+    bump_generations(*[project_scope(pk) for pk in counters])
+    return counters
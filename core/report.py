@@ -1,117 +1,477 @@
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import HttpResponse
-from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.core.files import File
 from django.core.files.storage import default_storage
-from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+from datetime import timedelta
 import os
-from .models import Project, Task
+import posixpath
+import tempfile
+import uuid
+import zipfile
+from .cache import get_generations, project_scope
+from .membership import is_project_member
+from .models import Project, ReportJob, Task
+from .permissions import IsAdminUserJWT
+from .progress import TASK_POINTS, project_progress, project_summaries, project_summary
+from .routers import ReplicaReadMixin
 from .serializers import ProjectSerializer
 from datetime import datetime
 
 
-# Task points based on status
-TASK_POINTS = {
-    'TODO': 0,
-    'IN_PROGRESS': 5,
-    'DONE': 10,
-}
+def iter_progress_report(project, summary):
+    """
+    Yield the text report in chunks. Task rows are read with a server-side
+    iterator, so memory stays bounded however many tasks the project has.
+    """
+    member_names = project.members.values_list('name', flat=True)
+
+    yield (
+        f"Project Progress Report: {project.name}\n"
+        f"Project Manager: {project.created_by.name}\n"
+        f"Team Members: {', '.join(member_names)}\n\n"
+        "Task Details:\n"
+    )
+
+    # Rows are grouped into a few hundred per chunk to keep writes to the client coarse.
+    rows = []
+    tasks = Task.objects.filter(project=project).values_list('title', 'status').iterator(chunk_size=2000)
+    for title, task_status in tasks:
+        rows.append(
+            f"- Task: {title}\n"
+            f"  Status: {task_status}\n"
+            f"  Points: {TASK_POINTS.get(task_status, 0)}\n\n"
+        )
+        if len(rows) == 500:
+            yield ''.join(rows)
+            rows = []
+    if rows:
+        yield ''.join(rows)
+
+    yield (
+        f"Total Tasks: {summary['total_tasks']}\n"
+        f"Completed Tasks: {summary['done']}\n"
+        f"In Progress Tasks: {summary['in_progress']}\n"
+        f"To Do Tasks: {summary['todo']}\n\n"
+        f"Overall Project Progress: {round(project_progress(summary), 2)}%\n\n"
+        f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        "Project Progress depends on task completion. The higher the number of tasks completed, the more progress the project has made.\n"
+        "A task is considered completed when it has the status 'DONE'. Tasks in 'IN_PROGRESS' or 'TODO' represent incomplete work.\n"
+    )
+
+
+def render_progress_report_pdf(project, summary, fileobj):
+    """
+    Draw the text report onto A4 pages, line by line, so the PDF carries
+    exactly what the TXT download does. Long lines are wrapped to the page.
+    """
+    width, height = A4
+    margin, leading, font_size = 50, 14, 10
+    pdf = canvas.Canvas(fileobj, pagesize=A4)
+    pdf.setTitle(f"Project Progress Report: {project.name}")
+    y = height - margin
+
+    def draw(line, font='Helvetica'):
+        nonlocal y
+        for part in simpleSplit(line, font, font_size, width - 2 * margin) or ['']:
+            if y < margin:
+                pdf.showPage()
+                y = height - margin
+            pdf.setFont(font, font_size)
+            pdf.drawString(margin, y, part)
+            y -= leading
+
+    pending = ''
+    first = True
+    for chunk in iter_progress_report(project, summary):
+        lines = (pending + chunk).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            draw(line, 'Helvetica-Bold' if first else 'Helvetica')
+            first = False
+    if pending:
+        draw(pending)
+    pdf.save()
+
+
+def report_version(project_id):
+    """
+    Content version of a project's report: the generation token of its cache
+    scope, bumped by every write that can change the report (core/signals.py).
+    Read from the cache, so it costs no query.
+    """
+    return report_versions([project_id])[project_id]
+
+
+def report_versions(project_ids):
+    """{project_id: version} with a single cache read."""
+    scopes = {project_id: project_scope(project_id) for project_id in project_ids}
+    generations = get_generations(scopes.values())
+    return {project_id: str(generations[scope]) for project_id, scope in scopes.items()}
+
+
+def report_path(project_id, version, extension='txt'):
+    return f"reports/project_{project_id}/{version}.{extension}"
+
+
+def store_report(name, chunks):
+    """
+    Write ``chunks`` (str or bytes) to ``default_storage`` under ``name``
+    without exposing a partial file, then drop older versions next to it.
+    Versions are generation tokens (nanosecond timestamps), so a writer that
+    lags behind never removes a newer report.
+    """
+    with tempfile.TemporaryFile() as spool:
+        for chunk in chunks:
+            spool.write(chunk.encode() if isinstance(chunk, str) else chunk)
+        spool.seek(0)
+
+        try:
+            final_path = default_storage.path(name)
+        except NotImplementedError:
+            # Remote object stores publish an upload in one step.
+            default_storage.save(name, File(spool))
+        else:
+            # Local disk: write under a temporary name, then rename into place.
+            temp_name = default_storage.save(f"{name}.{uuid.uuid4().hex}.tmp", File(spool))
+            os.replace(default_storage.path(temp_name), final_path)
+
+    folder = posixpath.dirname(name)
+    version, extension = posixpath.splitext(posixpath.basename(name))
+    for filename in default_storage.listdir(folder)[1]:
+        stem, ext = posixpath.splitext(filename)
+        if ext == extension and stem.isdigit() and version.isdigit() and int(stem) < int(version):
+            default_storage.delete(posixpath.join(folder, filename))
+
+
+def ensure_progress_report(project_id, version, summary=None):
+    """
+    Store the text report of ``version`` unless it already is; returns its
+    storage name. Also the unit of work of the export process pool.
+    """
+    name = report_path(project_id, version)
+    if not default_storage.exists(name):
+        project = Project.objects.select_related('created_by').get(pk=project_id)
+        store_report(name, iter_progress_report(project, summary or project_summary(project)))
+    return name
+
+
+def export_progress_reports(project_ids, map=map):
+    """
+    Make sure the current report of every project is stored, rendering the
+    missing ones through ``map`` (a process pool's map in the export
+    command). Counters and versions are read for all projects at once;
+    reports are rendered as the returned (project_id, storage name) pairs
+    are consumed, in project order.
+    """
+    project_ids = list(project_ids)
+    summaries = project_summaries(project_ids)
+    versions = report_versions(project_ids)
+    names = map(
+        ensure_progress_report,
+        project_ids,
+        [versions[pk] for pk in project_ids],
+        [summaries.get(pk) for pk in project_ids],
+    )
+    return zip(project_ids, names)
+
+
+class _ZipStream:
+    """Write-only sink for zipfile; the bytes written so far are taken with ``drain``."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_reports_zip(reports, chunk_size=64 * 1024):
+    """
+    Yield a ZIP archive of stored reports, [(project_id, storage name)], a
+    piece at a time: each file is copied from storage in ``chunk_size``
+    reads, so memory stays bounded however many projects are exported.
+    """
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for project_id, name in reports:
+            arcname = f"project_{project_id}_progress_report.txt"
+            with default_storage.open(name, 'rb') as source, archive.open(arcname, 'w') as target:
+                for chunk in iter(lambda: source.read(chunk_size), b''):
+                    target.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_queryset(ids=None, name=None):
+    """Projects selected for a bulk export: all, or filtered by ids and/or name."""
+    projects = Project.objects.order_by('pk')
+    if ids:
+        projects = projects.filter(pk__in=ids)
+    if name:
+        projects = projects.filter(name__icontains=name)
+    return projects
+
+
+def has_report_access(user, project_id):
+    """Admins see every report; other users only those of their projects."""
+    return user.role == 'ADMIN' or is_project_member(user, project_id)
+
+
+def enqueue_report_job(project_id, user, format='pdf'):
+    """
+    Queue a background report for the project's current content version.
+    A job already queued, running or done for that version is reused; a done
+    job whose file has gone from storage is queued again.
+    """
+    version = report_version(project_id)
+    job = (
+        ReportJob.objects.filter(project_id=project_id, format=format, version=version)
+        .exclude(state=ReportJob.FAILED).order_by('created_at').first()
+    )
+    if job is None:
+        job = ReportJob.objects.create(
+            project_id=project_id, requested_by=user, format=format, version=version,
+            file=report_path(project_id, version, format),
+        )
+    elif job.state == ReportJob.DONE and not default_storage.exists(job.file):
+        ReportJob.objects.filter(pk=job.pk, state=ReportJob.DONE).update(
+            state=ReportJob.PENDING, started_at=None, finished_at=None,
+        )
+        job.refresh_from_db()
+    return job
+
+
+def claim_report_jobs(limit):
+    """Mark up to ``limit`` pending jobs RUNNING and return their ids, oldest first."""
+    candidates = ReportJob.objects.filter(state=ReportJob.PENDING).order_by('created_at')
+    claimed = []
+    for job_id in candidates.values_list('id', flat=True)[:limit]:
+        # Conditional update: with several workers only one wins each job.
+        if ReportJob.objects.filter(id=job_id, state=ReportJob.PENDING).update(
+            state=ReportJob.RUNNING, started_at=timezone.now()
+        ):
+            claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale_report_jobs(timeout):
+    """Put RUNNING jobs older than ``timeout`` seconds (their worker died) back in the queue."""
+    return ReportJob.objects.filter(
+        state=ReportJob.RUNNING, started_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(state=ReportJob.PENDING, started_at=None)
+
+
+def run_report_job(job_id):
+    """
+    Render one claimed job into storage. Runs in a worker process; returns
+    (job_id, state).
+    """
+    job = ReportJob.objects.select_related('project__created_by').get(pk=job_id)
+    try:
+        if not default_storage.exists(job.file):
+            summary = project_summary(job.project)
+            if job.format == 'txt':
+                store_report(job.file, iter_progress_report(job.project, summary))
+            else:
+                with tempfile.TemporaryFile() as pdf:
+                    render_progress_report_pdf(job.project, summary, pdf)
+                    pdf.seek(0)
+                    store_report(job.file, iter(lambda: pdf.read(64 * 1024), b''))
+        job.state = ReportJob.DONE
+        job.error = ''
+    except Exception as e:
+        job.state = ReportJob.FAILED
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['state', 'error', 'finished_at'])
+    return job_id, job.state
+
+
+def report_job_data(job, request):
+    data = {
+        "job_id": str(job.id),
+        "project": job.project_id,
+        "format": job.format,
+        "status": job.state,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "status_url": request.build_absolute_uri(reverse('report-job-detail', args=[job.id])),
+    }
+    if job.state == ReportJob.DONE:
+        data["download_url"] = request.build_absolute_uri(reverse('report-job-download', args=[job.id]))
+    if job.state == ReportJob.FAILED:
+        data["error"] = job.error
+    return data
+
+
+REPORT_CONTENT_TYPES = {'txt': 'text/plain', 'pdf': 'application/pdf'}
+
+
+def serve_report(name, filename, content_type, etag):
+    response = FileResponse(default_storage.open(name, 'rb'), as_attachment=True,
+                            filename=filename, content_type=content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(default_storage.get_modified_time(name).timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 # Reporting view to generate the project progress report
-class ProjectProgressReportView(generics.RetrieveAPIView):
+class ProjectProgressReportView(ReplicaReadMixin, generics.RetrieveAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated] # authentication
 
 
+    def get_replica_generations(self):
+        # The stored report is keyed on this token; render it from the primary right after a write.
+        return [report_version(self.kwargs['pk'])]
+
+
     def get_queryset(self):
-        return Project.objects.all()
+        return Project.objects.select_related('created_by')
 
 
     def get(self, request, *args, **kwargs):
-        # Get the project
-        project = self.get_object()
         user = request.user
+        project_id = self.kwargs['pk']
 
 
         # Admin can see all projects, otherwise check if the user is part of the project
-        if user.role != 'ADMIN' and project not in user.projects.all():
+        if not has_report_access(user, project_id):
             return Response({"detail": "You do not have permission to view this report."}, status=status.HTTP_403_FORBIDDEN)
 
-        tasks = Task.objects.filter(project=project)
 
+        # Reports are stored per content version: an unchanged project is
+        # answered from the ETag alone, or from the stored file.
+        version = report_version(project_id)
+        etag = f'"{project_id}-{version}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
 
-        # Calculate task points and status
-        task_details = []
-        total_points = 0
-        total_tasks = tasks.count()
 
+        filename = f"project_{project_id}_progress_report.txt"
+        name = report_path(project_id, version)
+        if not default_storage.exists(name):
+            project = self.get_object()
+            store_report(name, iter_progress_report(project, project_summary(project)))
 
-        for task in tasks:
-            points = TASK_POINTS.get(task.status, 0)
-            task_details.append({
-                'task_title': task.title,
-                'status': task.status,
-                'points': points
-            })
-            total_points += points
 
+        return serve_report(name, filename, "text/plain", etag)
 
-        # Calculate project progress on a scale of 0 to 100
-        if total_tasks > 0:
-            project_progress = (total_points / (total_tasks * 10)) * 100  
-        else:
-            project_progress = 0
 
 
-        # List of project members
-        project_members = project.members.all()
-        member_names = [member.name for member in project_members]
+# PDF reports (and reports missing from a bulk export) are rendered by
+# `python manage.py run_report_jobs`; the request only queues the job.
+class ProjectProgressReportJobView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
 
 
-        # Prepare the report content as a more detailed text file
-        report_content = f"Project Progress Report: {project.name}\n"
-        report_content += f"Project Manager: {project.created_by.name}\n"
-        report_content += f"Team Members: {', '.join(member_names)}\n\n"
-        report_content += "Task Details:\n"
+    def post(self, request, *args, **kwargs):
+        project_id = self.kwargs['pk']
 
+        if not has_report_access(request.user, project_id):
+            return Response({"detail": "You do not have permission to view this report."}, status=status.HTTP_403_FORBIDDEN)
+        if not Project.objects.filter(pk=project_id).exists():
+            return Response({"detail": "Project not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        for task in task_details:
-            report_content += f"- Task: {task['task_title']}\n"
-            report_content += f"  Status: {task['status']}\n"
-            report_content += f"  Points: {task['points']}\n\n"
+        job = enqueue_report_job(project_id, request.user)
+        return Response(report_job_data(job, request), status=status.HTTP_202_ACCEPTED)
 
 
-        report_content += f"Total Tasks: {total_tasks}\n"
-        report_content += f"Completed Tasks: {Task.objects.filter(project=project, status='DONE').count()}\n"
-        report_content += f"In Progress Tasks: {Task.objects.filter(project=project, status='IN_PROGRESS').count()}\n"
-        report_content += f"To Do Tasks: {Task.objects.filter(project=project, status='TODO').count()}\n\n"
-        report_content += f"Overall Project Progress: {round(project_progress, 2)}%\n\n"
-        
-        report_content += f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        report_content += "Project Progress depends on task completion. The higher the number of tasks completed, the more progress the project has made.\n"
-        report_content += "A task is considered completed when it has the status 'DONE'. Tasks in 'IN_PROGRESS' or 'TODO' represent incomplete work.\n"
+class ReportJobMixin:
+    permission_classes = [permissions.IsAuthenticated]
 
 
-        project_folder = os.path.join(settings.MEDIA_ROOT, 'projects', str(project.id))
-        os.makedirs(project_folder, exist_ok=True)
+    def get_job(self):
+        """The job, or an error Response for a job the user may not see."""
+        job = ReportJob.objects.filter(pk=self.kwargs['job_id']).first()
+        if job is None:
+            return None, Response({"detail": "Report job not found."}, status=status.HTTP_404_NOT_FOUND)
+        if job.requested_by_id != self.request.user.pk and not has_report_access(self.request.user, job.project_id):
+            return None, Response({"detail": "You do not have permission to view this report."}, status=status.HTTP_403_FORBIDDEN)
+        return job, None
 
 
-        filename = f"project_{project.id}_progress_report.txt"
-        file_path = os.path.join(project_folder, filename)
+class ReportJobDetailView(ReportJobMixin, generics.GenericAPIView):
 
+    def get(self, request, *args, **kwargs):
+        job, error = self.get_job()
+        if error is not None:
+            return error
+        return Response(report_job_data(job, request))
 
-        with open(file_path, 'w') as report_file:
-            report_file.write(report_content)
 
+class ReportJobDownloadView(ReportJobMixin, generics.GenericAPIView):
 
-        response = HttpResponse(report_content, content_type="text/plain")
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    def get(self, request, *args, **kwargs):
+        job, error = self.get_job()
+        if error is not None:
+            return error
+        if job.state != ReportJob.DONE:
+            return Response({"detail": "Report is not ready yet.", "status": job.state}, status=status.HTTP_409_CONFLICT)
 
+        etag = f'"{job.project_id}-{job.version}-{job.format}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        if not default_storage.exists(job.file):
+            # A newer version of the report replaced this one.
+            return Response({"detail": "This report is outdated. Request a new one."}, status=status.HTTP_410_GONE)
+
+        filename = f"project_{job.project_id}_progress_report.{job.format}"
+        return serve_report(job.file, filename, REPORT_CONTENT_TYPES[job.format], etag)
 
-        return response
 
 
+# Bulk export: the current progress report of every (or each selected) project in one ZIP.
+class ProgressReportExportView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminUserJWT]
 
 
+    def get(self, request, *args, **kwargs):
+        # ?ids=1,2,3 and/or ?name=<part of the project name>
+        try:
+            ids = [int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()]
+        except ValueError:
+            return Response({"detail": "ids must be a comma-separated list of project ids."}, status=status.HTTP_400_BAD_REQUEST)
+
+        project_ids = list(export_queryset(ids, request.query_params.get('name')).values_list('pk', flat=True))
+        if not project_ids:
+            return Response({"detail": "No projects found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Only stored reports are zipped here. Missing ones are queued for
+        # run_report_jobs, like PDF reports, and the client asks again later.
+        versions = report_versions(project_ids)
+        reports = [(pk, report_path(pk, versions[pk])) for pk in project_ids]
+        missing = [pk for pk, name in reports if not default_storage.exists(name)]
+        if missing:
+            jobs = [enqueue_report_job(pk, request.user, format='txt') for pk in missing]
+            return Response({
+                "detail": f"{len(missing)} report(s) are being generated. Try again once the jobs are done.",
+                "jobs": [report_job_data(job, request) for job in jobs],
+            }, status=status.HTTP_202_ACCEPTED)
+
+        response = StreamingHttpResponse(iter_reports_zip(reports), content_type="application/zip")
+        response['Content-Disposition'] = 'attachment; filename="progress_reports.zip"'
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,120 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# Read replicas
+#
+# Writes always go to the primary (``default``). Reads go to a replica only
+# inside views that opt in with ReplicaReadMixin, and only when neither the
+# requester nor the data the response depends on changed within
+# REPLICA_STICKY_SECONDS. The first rule gives users read-your-writes; the
+# second keeps a lagging replica from serving rows that would then be cached
+# (response cache, stored reports) under an already bumped generation.
+
+STICKY_KEY = 'primary:{}'
+
+_read_database = ContextVar('read_database', default=None)
+
+
+def replica_aliases():
+    return list(settings.DATABASE_REPLICAS)
+
+
+@contextmanager
+def use_database(alias):
+    """Route reads of the current request (or task) to ``alias``; None for the default routing."""
+    token = _read_database.set(alias)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def use_primary():
+    """For reads whose result outlives the request (caches, counters): never a replica."""
+    return use_database(None)
+
+
+class PrimaryReplicaRouter:
+    """Database router for DATABASES['default'] plus the aliases in DATABASE_REPLICAS."""
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or an instance read from a replica would be saved back to it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary (sync_replicas), never migrated on their own.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def mark_primary_sticky(user_id):
+    """Keep ``user_id`` on the primary for REPLICA_STICKY_SECONDS."""
+    cache.set(STICKY_KEY.format(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def recently_written(user, generations=()):
+    """
+    Did ``user`` write, or did any of the ``generations`` (cache generation
+    tokens, nanosecond timestamps of the last write) move, within the window?
+    """
+    if cache.get(STICKY_KEY.format(user.pk)):
+        return True
+    horizon = time.time_ns() - settings.REPLICA_STICKY_SECONDS * 10 ** 9
+    return any(int(token) > horizon for token in generations)
+
+
+class ReplicaReadMixin:
+    """
+    For read-heavy generic views: GET and HEAD read from a random replica
+    unless ``recently_written`` says the requester must see the primary.
+    ``get_replica_generations`` returns the generation tokens the response
+    depends on; by default those ``cache_response`` looked up.
+    """
+
+    def get_replica_generations(self):
+        return getattr(self.request, 'cache_generations', {}).values()
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_primary():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)  # Authenticates; that read stays on the primary.
+        replicas = replica_aliases()
+        if (
+            replicas and request.method in ('GET', 'HEAD')
+            and not recently_written(request.user, self.get_replica_generations())
+        ):
+            _read_database.set(random.choice(replicas))  # Reset when dispatch returns.
+
+
+class PrimaryStickinessMiddleware:
+    """After an authenticated non-GET request, pin the user's reads to the primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and replica_aliases():
+            # DRF stores the user it authenticated on the underlying request.
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                mark_primary_sticky(user.pk)
+        return response
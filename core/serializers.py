@@ -2,12 +2,15 @@
 
 from core.models import User
 
-from .exceptions import InvalidUserDataException
+from .exceptions import DuplicateCommentException, InvalidUserDataException
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import Project, Task,Comment
+from .fieldsets import ExpandFieldsMixin, SparseFieldsMixin
+from .models import Project, Task, Comment, comment_digest
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -52,20 +55,110 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
 
 
-class ProjectSerializer(serializers.ModelSerializer):
-    members = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), many=True)
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact user, for ``?expand=`` (core/fieldsets.py)."""
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'role']
 
+
+class ProjectSummarySerializer(serializers.ModelSerializer):
+    """Compact project, for ``?expand=``."""
     class Meta:
         model = Project
-        fields = ['id', 'name', 'description', 'created_by', 'members', 'created_at']
-        read_only_fields = ['id', 'created_by', 'created_at']
+        fields = ['id', 'name']
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSummarySerializer(serializers.ModelSerializer):
+    """Compact task, for ``?expand=``."""
+    class Meta:
+        model = Task
+        fields = ['id', 'title', 'status']
+
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """
+    A list of primary keys resolved with one IN query, instead of the
+    query per id that ``PrimaryKeyRelatedField(many=True)`` makes.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pk_field = child.get_queryset().model._meta.pk
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(pk_field.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+        pks = list(dict.fromkeys(pks))  # Without repeats, in order
+
+        objects = child.get_queryset().in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in pks]
+
+
+def member_ids_field(**kwargs):
+    return BatchedManyRelatedField(child_relation=serializers.PrimaryKeyRelatedField(queryset=User.objects.all()), **kwargs)
+
+
+class ProjectSerializer(ExpandFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    members = member_ids_field()
+    expandable_fields = {'created_by': UserSummarySerializer, 'members': UserSummarySerializer}
+
+    class Meta:
+        model = Project
+        fields = ['id', 'name', 'description', 'created_by', 'members', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+
+
+class ProjectMembersSerializer(serializers.Serializer):
+    """Input of the add-members / remove-members endpoints."""
+    members = member_ids_field(allow_empty=False)
+
+
+class TaskSerializer(ExpandFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    duplicate_title_message = "A task with this title already exists in the project."
+    expandable_fields = {
+        'assigned_to': UserSummarySerializer,
+        'created_by': UserSummarySerializer,
+        'project': ProjectSummarySerializer,
+    }
+
     class Meta:
         model = Task
         fields = '__all__'
         read_only_fields = ['id', 'created_by', 'created_at']
+        # (project, title) uniqueness is left to the database constraint
+        # (see save); the generated validator would query before every write.
+        validators = []
+
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            # Only the failure path pays for telling a duplicate title apart from other errors.
+            data = {**self.validated_data, **kwargs}
+            project = data.get('project', getattr(self.instance, 'project', None))
+            title = data.get('title', getattr(self.instance, 'title', None))
+            duplicates = Task.objects.filter(project=project, title=title)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError(self.duplicate_title_message)
+            raise
 
 
     def validate_status(self, value):
@@ -75,9 +168,53 @@ class TaskSerializer(serializers.ModelSerializer):
         return value
 
 
+class BulkTaskSerializer(TaskSerializer):
+    """
+    Input of one item of a bulk task request. References stay plain ids:
+    core/bulk.py resolves them for the whole batch at once instead of one
+    lookup per item.
+    """
+    id = serializers.IntegerField(required=False)
+    project = serializers.IntegerField()
+    assigned_to = serializers.IntegerField(required=False, allow_null=True)
+
+
+class TaskStatusChangeSerializer(serializers.Serializer):
+    """One item of a batch status update: {"id": ..., "status": ...}."""
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Task._meta.get_field('status').choices)
+
+
+
+class CommentSerializer(ExpandFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        'created_by': UserSummarySerializer,
+        'task': TaskSummarySerializer,
+        'project': ProjectSummarySerializer,
+    }
 
-class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'content', 'created_by', 'task', 'project', 'created_at', 'updated_at']
-        read_only_fields = ['created_by', 'created_at', 'updated_at'] 
+        read_only_fields = ['created_by', 'created_at', 'updated_at']
+
+
+    def save(self, **kwargs):
+        # Duplicates are caught by the (created_by, task, content_digest)
+        # constraint instead of comparing the content column beforehand.
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            data = {**self.validated_data, **kwargs}
+            created_by = data.get('created_by', getattr(self.instance, 'created_by', None))
+            task = data.get('task', getattr(self.instance, 'task', None))
+            content = data.get('content', getattr(self.instance, 'content', ''))
+            duplicates = Comment.objects.filter(
+                created_by=created_by, task=task, content_digest=comment_digest(content),
+            )
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise DuplicateCommentException()
+            raise 
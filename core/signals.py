@@ -0,0 +1,180 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import forget_cached_user
+from .cache import bump_generations, project_scope, user_scope
+from .db import configure_sqlite_connection
+from .membership import invalidate_created_projects, invalidate_memberships
+from .models import Comment, Project, ProjectProgress, Task, User
+from .progress import adjust_counters, apply_counter_deltas
+
+
+# Bulk task writes (core/bulk.py) adjust the counters and bump the
+# generations once for the whole batch; meanwhile the per-row task handlers
+# below, and those of the comments a task delete cascades to, stand down.
+_batched_task_writes = ContextVar('batched_task_writes', default=False)
+
+
+@contextmanager
+def batched_task_writes():
+    token = _batched_task_writes.set(True)
+    try:
+        yield
+    finally:
+        _batched_task_writes.reset(token)
+
+
+# Task: remember where the row was before the save so a reassignment or a move
+# to another project invalidates both the old and the new audience, and the
+# project counters can move the task between statuses and projects.
+PLACEMENT_FIELDS = {'project', 'project_id', 'assigned_to', 'assigned_to_id', 'status'}
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_placement(sender, instance, update_fields=None, **kwargs):
+    instance._previous_placement = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not PLACEMENT_FIELDS & set(update_fields):
+        # Those columns aren't written, so the row stays where the instance says.
+        instance._previous_placement = (instance.project_id, instance.assigned_to_id, instance.status)
+        return
+    instance._previous_placement = (
+        Task.objects.filter(pk=instance.pk).values_list('project_id', 'assigned_to_id', 'status').first()
+    )
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task(sender, instance, **kwargs):
+    if _batched_task_writes.get():
+        return
+    scopes = [project_scope(instance.project_id), user_scope(instance.assigned_to_id)]
+    previous = getattr(instance, '_previous_placement', None)
+    if previous:
+        scopes += [project_scope(previous[0]), user_scope(previous[1])]
+    bump_generations(*scopes)
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, **kwargs):
+    if _batched_task_writes.get():
+        return
+    previous = getattr(instance, '_previous_placement', None)
+    if previous and (previous[0], previous[2]) == (instance.project_id, instance.status):
+        return
+    deltas = Counter({(instance.project_id, instance.status): 1})
+    if previous:
+        deltas[(previous[0], previous[2])] -= 1
+    apply_counter_deltas(deltas)  # One UPDATE when the task stays in its project
+
+
+@receiver(post_delete, sender=Task)
+def count_deleted_task(sender, instance, **kwargs):
+    if _batched_task_writes.get():
+        return
+    adjust_counters(instance.project_id, instance.status, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    if _batched_task_writes.get():
+        return
+    scopes = [project_scope(instance.project_id), user_scope(instance.created_by_id)]
+    if instance.task_id:
+        # Developers see comments through the tasks assigned to them.
+        placement = Task.objects.filter(pk=instance.task_id).values_list('project_id', 'assigned_to_id').first()
+        if placement:
+            scopes += [project_scope(placement[0]), user_scope(placement[1])]
+    bump_generations(*scopes)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project(sender, instance, **kwargs):
+    if kwargs.get('created', True):  # Created or deleted: the creator's project ids change.
+        invalidate_created_projects(instance.created_by_id)
+    bump_generations(project_scope(instance.pk), user_scope(instance.created_by_id))
+
+
+@receiver(post_save, sender=Project)
+def create_project_counters(sender, instance, created, **kwargs):
+    if created:
+        ProjectProgress.objects.get_or_create(project=instance)
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def invalidate_project_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # The cleared side is gone by post_clear, so collect it now.
+        if reverse:
+            pk_set = set(instance.projects.values_list('id', flat=True))
+        else:
+            pk_set = set(instance.members.values_list('id', flat=True))
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        scopes = [user_scope(instance.pk)] + [project_scope(pk) for pk in pk_set or ()]
+        invalidate_memberships(instance.pk)
+        instance.__dict__.pop('_member_project_ids', None)
+        project_ids = pk_set or ()
+    else:
+        scopes = [project_scope(instance.pk)] + [user_scope(pk) for pk in pk_set or ()]
+        invalidate_memberships(*(pk_set or ()))
+        project_ids = [instance.pk]
+    # The member list is part of the project's representation (and its ETag).
+    Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
+    bump_generations(*scopes)
+
+
+# The delete cascade removes memberships without m2m_changed.
+@receiver(pre_delete, sender=Project)
+def invalidate_deleted_project_members(sender, instance, **kwargs):
+    invalidate_memberships(*instance.members.values_list('id', flat=True))
+
+
+def _user_project_scopes(user):
+    # Progress reports print member and manager names.
+    project_ids = Project.objects.filter(Q(members=user) | Q(created_by=user)).values_list('id', flat=True).distinct()
+    return [project_scope(pk) for pk in project_ids]
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, **kwargs):
+    scopes = [user_scope(instance.pk)]
+    if not created:
+        scopes += _user_project_scopes(instance)
+    else:
+        # SQLite can hand a deleted user's id to a new row; it must not inherit cached state.
+        invalidate_memberships(instance.pk)
+        invalidate_created_projects(instance.pk)
+    # Role, name, deactivation or password: the next request reloads the user.
+    forget_cached_user(instance.pk)
+    bump_generations(*scopes)
+
+
+# Memberships are removed by the delete cascade without m2m_changed, so the
+# affected projects are collected before the user row goes.
+@receiver(pre_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    # Their memberships and assignments go without a save: move updated_at of what they leave.
+    now = timezone.now()
+    Project.objects.filter(members=instance).update(updated_at=now)
+    Task.objects.filter(assigned_to=instance).update(updated_at=now)
+    bump_generations(user_scope(instance.pk), *_user_project_scopes(instance))
+    invalidate_memberships(instance.pk)
+    invalidate_created_projects(instance.pk)
+    forget_cached_user(instance.pk)
+
+
+# Database: apply the SQLite connection profile (settings.SQLITE_PRAGMAS).
+connection_created.connect(configure_sqlite_connection, dispatch_uid='core.configure_sqlite_connection')
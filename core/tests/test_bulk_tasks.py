@@ -0,0 +1,293 @@
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Comment, Notification, Project, ProjectProgress, Task, User
+
+
+
+
+def get_jwt_token_for_user(user):
+    """Helper function to get JWT token for a user"""
+    refresh = RefreshToken.for_user(user)
+    return str(refresh.access_token)
+
+
+
+
+class BulkTaskTestSetup(APITestCase):
+    """Test setup class to create users, projects and tasks for the bulk endpoint"""
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', name='Admin', role='ADMIN')
+        self.pm = User.objects.create_user(email='pm@example.com', password='pmpass', name='PM', role='PROJECT_MANAGER')
+        self.dev = User.objects.create_user(email='dev@example.com', password='devpass', name='Dev', role='DEVELOPER')
+
+        self.project = Project.objects.create(name='Demo Project', created_by=self.admin)
+        self.project.members.add(self.pm, self.dev)
+        self.other_project = Project.objects.create(name='Other Project', created_by=self.admin)
+
+        self.task = Task.objects.create(title="Existing Task", description="d", project=self.project, created_by=self.admin)
+        self.url = reverse('task-bulk')
+        self.login(self.pm)
+
+
+    def login(self, user):
+        token = get_jwt_token_for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+    def counters(self, project):
+        progress = ProjectProgress.objects.get(pk=project.pk)
+        return progress.todo, progress.in_progress, progress.done, progress.total_points
+
+
+    def new_tasks(self, count, project=None, start=0):
+        project = project or self.project
+        return [{"title": f"Task {n}", "description": "d", "project": project.id} for n in range(start, start + count)]
+
+
+
+
+class BulkTaskCreateTests(BulkTaskTestSetup):
+    """Test suite for creating tasks in bulk"""
+
+    def test_bulk_create(self):
+        print("\nRunning test_bulk_create...")
+        items = self.new_tasks(3)
+        items[2].update(status='DONE', assigned_to=self.dev.id)
+        res = self.client.post(self.url, items, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([task['title'] for task in res.data], ["Task 0", "Task 1", "Task 2"])
+        self.assertTrue(all(task['id'] for task in res.data))
+        self.assertEqual(res.data[2]['assigned_to'], self.dev.id)
+        self.assertEqual(Task.objects.filter(project=self.project, created_by=self.pm).count(), 3)
+        self.assertEqual(self.counters(self.project), (3, 0, 1, 10))
+        print("✅ Test passed.")
+
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        print("\nRunning test_query_count_does_not_grow_with_batch_size...")
+        res = self.client.post(self.url, self.new_tasks(1, start=1000), format='json')  # Warms the user and membership caches
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connection) as small:
+            res = self.client.post(self.url, self.new_tasks(5), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.post(self.url, self.new_tasks(100, start=5), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        print(f"Queries: 5 tasks -> {len(small)}, 100 tasks -> {len(large)}")
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(self.counters(self.project)[0], 107)
+        print("✅ Test passed.")
+
+
+    def test_errors_are_reported_per_item(self):
+        print("\nRunning test_errors_are_reported_per_item...")
+        items = [
+            {"title": "Fine", "description": "d", "project": self.project.id},
+            {"title": "Existing Task", "description": "d", "project": self.project.id},
+            {"title": "Fine", "description": "d", "project": self.project.id},
+            {"title": "Elsewhere", "description": "d", "project": self.other_project.id},
+            {"title": "Nobody", "description": "d", "project": self.project.id, "assigned_to": 99999},
+        ]
+        res = self.client.post(self.url, items, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertEqual(res.data[1], {"title": ["A task with this title already exists in the project."]})
+        self.assertEqual(res.data[2], {"title": ["A task with this title already exists in the project."]})
+        self.assertEqual(res.data[3], {"project": ["You can only add tasks to projects you are a member of."]})
+        self.assertIn("assigned_to", res.data[4])
+        self.assertEqual(Task.objects.count(), 1)  # All or nothing
+        print("✅ Test passed.")
+
+
+    def test_invalid_fields_and_roles(self):
+        print("\nRunning test_invalid_fields_and_roles...")
+        res = self.client.post(self.url, [{"title": "No project", "description": "d", "status": "LATER"}], format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data[0]), {"project", "status"})
+
+        res = self.client.post(self.url, {"title": "Not a list"}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.login(self.dev)
+        res = self.client.post(self.url, self.new_tasks(1), format='json')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        print("✅ Test passed.")
+
+
+
+
+class BulkTaskUpdateDeleteTests(BulkTaskTestSetup):
+    """Test suite for updating and deleting tasks in bulk"""
+    def setUp(self):
+        super().setUp()
+        self.tasks = Task.objects.bulk_create(
+            Task(title=f"Task {n}", description="d", project=self.project, created_by=self.admin) for n in range(3)
+        )
+        from core.progress import rebuild_counters
+        rebuild_counters([self.project.id])
+
+
+    def list_statuses(self):
+        res = self.client.get(reverse('task-list'), {'page_size': 50})
+        return {task['title']: task['status'] for task in res.data['results']}
+
+
+    def test_bulk_update(self):
+        print("\nRunning test_bulk_update...")
+        self.assertEqual(self.list_statuses()["Task 0"], 'TODO')  # Cache the list
+        items = [
+            {"id": self.tasks[0].id, "status": "DONE"},
+            {"id": self.tasks[1].id, "status": "IN_PROGRESS", "assigned_to": self.dev.id},
+            {"id": self.tasks[2].id, "title": "Task 0 follow-up"},
+        ]
+        res = self.client.patch(self.url, items, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([task['id'] for task in res.data], [task.id for task in self.tasks])
+        self.assertEqual(Task.objects.get(pk=self.tasks[1].id).assigned_to, self.dev)
+        self.assertEqual(self.counters(self.project), (2, 1, 1, 15))
+
+        statuses = self.list_statuses()  # The cached list was invalidated
+        self.assertEqual(statuses["Task 0"], 'DONE')
+        self.assertIn("Task 0 follow-up", statuses)
+        print("✅ Test passed.")
+
+
+    def test_bulk_update_errors(self):
+        print("\nRunning test_bulk_update_errors...")
+        items = [
+            {"id": self.tasks[0].id, "title": "Existing Task"},
+            {"id": self.tasks[1].id, "project": self.other_project.id},
+        ]
+        res = self.client.patch(self.url, items, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[1], {"project": ["Tasks can't be moved to another project in bulk."]})
+
+        items = [
+            {"id": self.tasks[0].id, "title": "Existing Task"},
+            {"id": self.tasks[0].id, "status": "DONE"},
+            {"id": 99999, "status": "DONE"},
+        ]
+        res = self.client.patch(self.url, items, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {"title": ["A task with this title already exists in the project."]})
+        self.assertEqual(res.data[1], {"id": ["This task appears more than once in the request."]})
+        self.assertEqual(res.data[2], {"id": ["Task not found."]})
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].id).status, 'TODO')
+        print("✅ Test passed.")
+
+
+    def test_bulk_delete(self):
+        print("\nRunning test_bulk_delete...")
+        Task.objects.filter(pk=self.tasks[0].id).update(status='DONE')
+        from core.progress import rebuild_counters
+        rebuild_counters([self.project.id])
+        Comment.objects.create(content="On task 0", task=self.tasks[0], project=self.project, created_by=self.pm)
+        self.assertIn("Task 0", self.list_statuses())  # Cache the list
+
+        ids = [self.tasks[0].id, self.tasks[1].id]
+        res = self.client.delete(self.url, {"ids": ids}, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['deleted'], 2)
+        self.assertFalse(Task.objects.filter(pk__in=ids).exists())
+        self.assertFalse(Comment.objects.filter(task_id__in=ids).exists())
+        self.assertEqual(self.counters(self.project), (2, 0, 0, 0))
+        self.assertEqual(set(self.list_statuses()), {"Existing Task", "Task 2"})
+
+        res = self.client.delete(self.url, {"ids": [self.tasks[2].id, 99999]}, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data, [{}, {"id": ["Task not found."]}])
+        self.assertTrue(Task.objects.filter(pk=self.tasks[2].id).exists())
+        print("✅ Test passed.")
+
+
+
+
+class BulkTaskStatusTests(BulkTaskTestSetup):
+    """Test suite for developers updating the status of several tasks at once"""
+    def setUp(self):
+        super().setUp()
+        self.lead = User.objects.create_user(email='lead@example.com', password='leadpass', name='Lead', role='TECH_LEAD')
+        self.project.members.add(self.lead)
+        self.other_project.members.add(self.dev, self.lead)
+        self.mine = Task.objects.bulk_create(
+            Task(title=f"Mine {n}", description="d", project=self.project, assigned_to=self.dev, created_by=self.admin)
+            for n in range(3)
+        )
+        self.elsewhere = Task.objects.create(title="Mine elsewhere", description="d", project=self.other_project,
+                                             assigned_to=self.dev, created_by=self.admin)
+        from core.progress import rebuild_counters
+        rebuild_counters([self.project.id, self.other_project.id])
+        self.url = reverse('task-bulk-status-update')
+        self.login(self.dev)
+
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOW=0)  # Batch rows are grouped without a digest window too
+    def test_batch_status_update(self):
+        print("\nRunning test_batch_status_update...")
+        items = [
+            {"id": self.mine[0].id, "status": "DONE"},
+            {"id": self.mine[1].id, "status": "DONE"},
+            {"id": self.mine[2].id, "status": "IN_PROGRESS"},
+            {"id": self.elsewhere.id, "status": "DONE"},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(self.url, items, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['updated']), 4)
+        task_updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "core_task"')]
+        self.assertEqual(len(task_updates), 2)  # One per target status
+        self.assertEqual(Task.objects.filter(assigned_to=self.dev, status='DONE').count(), 3)
+        self.assertEqual(self.counters(self.project), (1, 1, 2, 25))
+        self.assertEqual(self.counters(self.other_project), (0, 0, 1, 10))
+
+        self.assertEqual(Notification.objects.count(), 4)
+        call_command('send_notifications')
+        print(f"Mail: {[m.body for m in mail.outbox]}")
+        self.assertEqual(len(mail.outbox), 2)  # One per project, listing all its changes
+        body = next(m.body for m in mail.outbox if "Mine 0" in m.body)
+        self.assertIn("Mine 1: DONE", body)
+        self.assertIn("Mine 2: IN_PROGRESS", body)
+        self.assertEqual(mail.outbox[0].to, ['lead@example.com'])
+        print("✅ Test passed.")
+
+
+    def test_batch_status_requires_ownership(self):
+        print("\nRunning test_batch_status_requires_ownership...")
+        items = [
+            {"id": self.mine[0].id, "status": "DONE"},
+            {"id": self.task.id, "status": "DONE"},
+            {"id": self.mine[1].id, "status": "LATER"},
+        ]
+        res = self.client.patch(self.url, items, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("status", res.data[2])
+
+        res = self.client.patch(self.url, items[:2], format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[1], {"id": ["You can only update the status of tasks assigned to you."]})
+        self.assertEqual(Task.objects.get(pk=self.mine[0].id).status, 'TODO')
+        self.assertFalse(Notification.objects.exists())
+
+        self.login(self.pm)
+        res = self.client.patch(self.url, items[:1], format='json')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        print("✅ Test passed.")
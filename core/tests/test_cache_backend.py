@@ -0,0 +1,98 @@
+import time
+
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from core.cache_backends import TwoTierCache
+from core.models import User
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+
+
+def get_jwt_token_for_user(user):
+    """Helper function to get JWT token for a user"""
+    refresh = RefreshToken.for_user(user)
+    return str(refresh.access_token)
+
+
+def make_cache(name, **options):
+    """Helper function to build a private in-memory cache for one test"""
+    options.setdefault('L1_MAX_ENTRIES', 3)
+    return TwoTierCache(f':memory:{name}', {'TIMEOUT': 300, 'OPTIONS': options})
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    """Test suite for the L1/L2 cache backend"""
+
+    def test_roundtrip_and_counters(self):
+        print("\nRunning test_roundtrip_and_counters...")
+        cache = make_cache(self.id())
+        self.assertIsNone(cache.get('missing'))
+        cache.set('key', {'a': 1})
+        self.assertEqual(cache.get('key'), {'a': 1})
+        stats = cache.stats()
+        print(f"Stats: {stats}")
+        self.assertEqual(stats['l1_hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        print("✅ Test passed.")
+
+
+    def test_l1_is_bounded_and_l2_backfills(self):
+        print("\nRunning test_l1_is_bounded_and_l2_backfills...")
+        cache = make_cache(self.id())
+        for i in range(5):
+            cache.set(f'key{i}', i)
+        self.assertEqual(cache.stats()['l1_entries'], 3)
+        self.assertEqual(cache.get('key0'), 0)  # evicted from L1, served by L2
+        self.assertEqual(cache.stats()['l2_hits'], 1)
+        print("✅ Test passed.")
+
+
+    def test_ttl_expiry(self):
+        print("\nRunning test_ttl_expiry...")
+        cache = make_cache(self.id())
+        cache.set('short', 'value', timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('short'))
+        self.assertTrue(cache.add('short', 'again'))
+        self.assertFalse(cache.add('short', 'ignored'))
+        self.assertEqual(cache.get('short'), 'again')
+        print("✅ Test passed.")
+
+
+    def test_l2_only_prefixes_skip_l1(self):
+        print("\nRunning test_l2_only_prefixes_skip_l1...")
+        cache = make_cache(self.id(), L2_ONLY_PREFIXES=['gen:'])
+        cache.set('gen:all', 1)
+        self.assertEqual(cache.stats()['l1_entries'], 0)
+        self.assertEqual(cache.get('gen:all'), 1)
+        cache.delete('gen:all')
+        self.assertIsNone(cache.get('gen:all'))
+        print("✅ Test passed.")
+
+
+class CacheStatsViewTests(APITestCase):
+    """Test suite for the cache statistics endpoint"""
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', name='Admin', role='ADMIN')
+        self.dev = User.objects.create_user(email='dev@example.com', password='devpass', name='Dev', role='DEVELOPER')
+
+
+    def test_admin_can_read_cache_stats(self):
+        print("\nRunning test_admin_can_read_cache_stats...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.admin)}')
+        res = self.client.get(reverse('cache-stats'))
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('hit_ratio', res.data)
+        print("✅ Test passed.")
+
+
+    def test_non_admin_cannot_read_cache_stats(self):
+        print("\nRunning test_non_admin_cannot_read_cache_stats...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        res = self.client.get(reverse('cache-stats'))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        print("✅ Test passed.")
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+
+
+
+def pragma(name):
+    """Helper function to read a PRAGMA on the default connection"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+
+
+class SQLiteConnectionProfileTests(TestCase):
+    """Test suite for the PRAGMAs applied to new SQLite connections"""
+
+    def test_pragmas_applied_on_connect(self):
+        print("\nRunning test_pragmas_applied_on_connect...")
+        self.assertEqual(pragma('busy_timeout'), settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(pragma('cache_size'), settings.SQLITE_PRAGMAS['cache_size'])
+        self.assertEqual(pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(pragma('temp_store'), 2)  # MEMORY
+        print("✅ Test passed.")
+
+
+    def test_dbmaintain_refuses_to_run_in_a_transaction(self):
+        print("\nRunning test_dbmaintain_refuses_to_run_in_a_transaction...")
+        with self.assertRaises(CommandError):
+            call_command('dbmaintain', stdout=StringIO())
+        print("✅ Test passed.")
+
+
+
+
+class DBMaintainCommandTests(TransactionTestCase):
+    """Test suite for the dbmaintain management command"""
+
+    def fill_freelist(self):
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE maintenance_junk (x BLOB)')
+            cursor.execute(
+                'WITH RECURSIVE c(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM c WHERE i < 200)'
+                ' INSERT INTO maintenance_junk SELECT randomblob(1000) FROM c'
+            )
+            cursor.execute('DROP TABLE maintenance_junk')
+
+
+    def test_reports_every_step_and_sizes(self):
+        print("\nRunning test_reports_every_step_and_sizes...")
+        out = StringIO()
+        call_command('dbmaintain', stdout=out)
+        output = out.getvalue()
+        print(output)
+        for line in ('analyze', 'optimize', 'checkpoint', 'incremental_vacuum', 'pages size', 'free size'):
+            self.assertIn(line, output)
+        print("✅ Test passed.")
+
+
+    def test_incremental_vacuum_releases_free_pages(self):
+        print("\nRunning test_incremental_vacuum_releases_free_pages...")
+        call_command('dbmaintain', '--full-vacuum', stdout=StringIO())
+        self.assertEqual(pragma('auto_vacuum'), 2)  # INCREMENTAL
+
+        self.fill_freelist()
+        free = pragma('freelist_count')
+        self.assertGreater(free, 10)
+
+        out = StringIO()
+        call_command('dbmaintain', '--vacuum-pages', '10', stdout=out)
+        print(out.getvalue())
+        self.assertIn('10 pages released', out.getvalue())
+        self.assertEqual(pragma('freelist_count'), free - 10)
+
+        call_command('dbmaintain', stdout=StringIO())
+        self.assertEqual(pragma('freelist_count'), 0)
+        print("✅ Test passed.")
@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from core.membership import created_project_ids, is_project_member, member_project_ids
+from core.models import User, Project, Task
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+
+
+def get_jwt_token_for_user(user):
+    """Helper function to get JWT token for a user"""
+    refresh = RefreshToken.for_user(user)
+    return str(refresh.access_token)
+
+
+
+
+class MembershipServiceTests(APITestCase):
+    """Test suite for the cached project membership lookups"""
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', role='ADMIN', name='admin')
+        self.dev = User.objects.create_user(email='dev@example.com', password='devpass', role='DEVELOPER', name='dev')
+        self.project = Project.objects.create(name='Demo Project', created_by=self.admin)
+        self.other = Project.objects.create(name='Other Project', created_by=self.admin)
+        self.project.members.add(self.dev)
+
+
+    def fresh(self, user):
+        # A new instance, as each request loads its own user.
+        return User.objects.get(pk=user.pk)
+
+
+    def test_lookup_is_memoized_and_cached(self):
+        print("\nRunning test_lookup_is_memoized_and_cached...")
+        dev = self.fresh(self.dev)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(is_project_member(dev, self.project))
+            self.assertFalse(is_project_member(dev, self.other.id))
+        self.assertEqual(len(queries), 1)
+
+        dev = self.fresh(self.dev)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(member_project_ids(dev), {self.project.id})
+        self.assertEqual(len(queries), 0)
+        print("✅ Test passed.")
+
+
+    def test_membership_changes_invalidate_cache(self):
+        print("\nRunning test_membership_changes_invalidate_cache...")
+        self.assertEqual(member_project_ids(self.fresh(self.dev)), {self.project.id})
+
+        self.other.members.add(self.dev)
+        self.assertEqual(member_project_ids(self.fresh(self.dev)), {self.project.id, self.other.id})
+
+        self.dev.projects.remove(self.project)
+        self.assertEqual(member_project_ids(self.fresh(self.dev)), {self.other.id})
+
+        self.other.members.clear()
+        self.assertEqual(member_project_ids(self.fresh(self.dev)), frozenset())
+
+        self.project.members.set([self.dev])
+        self.assertEqual(member_project_ids(self.fresh(self.dev)), {self.project.id})
+
+        self.project.delete()
+        self.assertEqual(member_project_ids(self.fresh(self.dev)), frozenset())
+        print("✅ Test passed.")
+
+
+    def test_created_projects_are_cached(self):
+        print("\nRunning test_created_projects_are_cached...")
+        self.assertEqual(created_project_ids(self.fresh(self.admin)), {self.project.id, self.other.id})
+        with CaptureQueriesContext(connection) as queries:
+            created_project_ids(self.fresh(self.admin))
+        self.assertEqual(len(queries), 1)  # Only the fresh() load
+
+        third = Project.objects.create(name='Third Project', created_by=self.admin)
+        self.assertEqual(created_project_ids(self.fresh(self.admin)), {self.project.id, self.other.id, third.id})
+        self.other.delete()
+        self.assertEqual(created_project_ids(self.fresh(self.admin)), {self.project.id, third.id})
+        print("✅ Test passed.")
+
+
+    def test_cache_hit_runs_no_query(self):
+        print("\nRunning test_cache_hit_runs_no_query...")
+        Task.objects.create(title="Sample Task", project=self.project, created_by=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        url = reverse('task-list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        print(f"Response: {res.status_code}, queries: {[q['sql'] for q in queries]}")
+        self.assertEqual(len(queries), 0)  # Identity from the cached project ids, user authenticated once
+        print("✅ Test passed.")
+
+
+    def test_removed_member_loses_access(self):
+        print("\nRunning test_removed_member_loses_access...")
+        task = Task.objects.create(title="Sample Task", project=self.project, created_by=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        data = {"content": "First", "project": self.project.id, "task": task.id}
+        res = self.client.post(reverse('comment-create'), data)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.project.members.remove(self.dev)
+        res = self.client.post(reverse('comment-create'), {**data, "content": "Second"})
+        print(f"Response: {res.status_code}")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        print("✅ Test passed.")
@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Project, Task, Notification
+from core.notify import enqueue_task_updates
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+
+
+def get_jwt_token_for_user(user):
+    """Helper function to get JWT token for a user"""
+    refresh = RefreshToken.for_user(user)
+    return str(refresh.access_token)
+
+
+
+
+class NotificationTestSetup(APITestCase):
+    """Test setup class to create a project with a tech lead and a developer task"""
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', name='Admin', role='ADMIN')
+        self.lead = User.objects.create_user(email='lead@example.com', password='leadpass', name='Lead', role='TECH_LEAD')
+        self.dev = User.objects.create_user(email='dev@example.com', password='devpass', name='Dev', role='DEVELOPER')
+
+        self.project = Project.objects.create(name='Demo Project', created_by=self.admin)
+        self.project.members.add(self.lead, self.dev)
+        self.task = Task.objects.create(title="Sample Task", project=self.project, assigned_to=self.dev, created_by=self.admin)
+
+
+
+
+class NotificationOutboxTests(NotificationTestSetup):
+    """Test suite for queueing and delivering task status notifications"""
+
+    def test_status_update_queues_without_sending(self):
+        print("\nRunning test_status_update_queues_without_sending...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        url = reverse('developer-task-status-update', kwargs={'pk': self.task.id})
+        self.client.get(reverse('task-list'))  # Warm the cached user record
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(url, {"status": "DONE"})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        notification = Notification.objects.get()
+        self.assertEqual((notification.task_status, notification.state), ('DONE', Notification.PENDING))
+        self.assertEqual(notification.updated_by, 'Dev')
+        # The author's name comes from the request user, not a lazy load of the assignee.
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and 'FROM "core_user"' in q['sql']])
+        print("✅ Test passed.")
+
+
+    def test_worker_sends_pending_notifications(self):
+        print("\nRunning test_worker_sends_pending_notifications...")
+        Notification.objects.create(project=self.project, task=self.task, task_title=self.task.title, task_status='DONE', updated_by='Dev')
+        call_command('send_notifications')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['lead@example.com'])
+        self.assertEqual(Notification.objects.get().state, Notification.SENT)
+        print("✅ Test passed.")
+
+
+    def test_worker_retries_with_backoff(self):
+        print("\nRunning test_worker_retries_with_backoff...")
+        Notification.objects.create(project=self.project, task=self.task, task_title=self.task.title, task_status='DONE')
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError("SMTP down")):
+            call_command('send_notifications', max_attempts=2)
+        notification = Notification.objects.get()
+        self.assertEqual((notification.state, notification.attempts), (Notification.PENDING, 1))
+        self.assertGreater(notification.next_attempt_at, notification.created_at)
+        print("✅ Test passed.")
+
+
+    def test_digest_coalesces_changes_per_tech_lead(self):
+        print("\nRunning test_digest_coalesces_changes_per_tech_lead...")
+        second = Task.objects.create(title="Second Task", project=self.project, assigned_to=self.dev, created_by=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        for task, new_status in [(self.task, "IN_PROGRESS"), (second, "IN_PROGRESS"), (self.task, "DONE")]:
+            self.client.patch(reverse('developer-task-status-update', kwargs={'pk': task.id}), {"status": new_status})
+
+        # Still inside the coalescing window: nothing is due yet.
+        call_command('send_notifications', digest_window=60)
+        self.assertEqual(len(mail.outbox), 0)
+
+        Notification.objects.filter(pk=Notification.objects.earliest('id').pk).update(next_attempt_at=timezone.now())
+        call_command('send_notifications', digest_window=60)
+        print(f"Mail: {mail.outbox[0].body if mail.outbox else None}")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Sample Task: DONE", mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].body.count("Sample Task"), 1)  # Last status per task wins
+        self.assertIn("Second Task: IN_PROGRESS", mail.outbox[0].body)
+        self.assertFalse(Notification.objects.filter(state=Notification.PENDING).exists())
+        print("✅ Test passed.")
+
+
+    def test_batch_goes_out_as_one_email(self):
+        print("\nRunning test_batch_goes_out_as_one_email...")
+        second = Task.objects.create(title="Second Task", project=self.project, assigned_to=self.dev, created_by=self.admin)
+        self.task.status = second.status = 'DONE'
+        enqueue_task_updates([self.task, second], 'Dev')
+        Notification.objects.update(next_attempt_at=timezone.now())
+
+        # Even when batch_size cuts through the batch.
+        call_command('send_notifications', digest_window=0, batch_size=1)
+        print(f"Mail: {mail.outbox[0].body if mail.outbox else None}")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Sample Task: DONE", mail.outbox[0].body)
+        self.assertIn("Second Task: DONE", mail.outbox[0].body)
+        self.assertFalse(Notification.objects.filter(state=Notification.PENDING).exists())
+        print("✅ Test passed.")
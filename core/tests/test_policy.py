@@ -0,0 +1,118 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from core.models import User, Project, Task, Comment
+from core.membership import member_project_ids
+from core.policy import CONDITIONS, POLICY, allowed_ids, authorized
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+
+
+def get_jwt_token_for_user(user):
+    """Helper function to get JWT token for a user"""
+    refresh = RefreshToken.for_user(user)
+    return str(refresh.access_token)
+
+
+
+
+class PolicyTests(APITestCase):
+    """Test suite for the role policy table and its compiled filters"""
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', role='ADMIN', name='admin')
+        self.pm = User.objects.create_user(email='pm@example.com', password='pmpass', role='PROJECT_MANAGER', name='pm')
+        self.tl = User.objects.create_user(email='tl@example.com', password='tlpass', role='TECH_LEAD', name='tl')
+        self.dev = User.objects.create_user(email='dev@example.com', password='devpass', role='DEVELOPER', name='dev')
+
+        self.project = Project.objects.create(name='Demo Project', created_by=self.pm)
+        self.other = Project.objects.create(name='Other Project', created_by=self.admin)
+        self.project.members.add(self.tl, self.dev)
+        self.other.members.add(self.dev)
+
+        self.task = Task.objects.create(title="Mine", project=self.project, assigned_to=self.dev, created_by=self.pm)
+        self.other_task = Task.objects.create(title="Theirs", project=self.other, created_by=self.admin)
+        self.comment = Comment.objects.create(content="By dev", task=self.task, project=self.project, created_by=self.dev)
+        self.tl_comment = Comment.objects.create(content="By tl", task=self.task, project=self.project, created_by=self.tl)
+        self.other_comment = Comment.objects.create(content="Elsewhere", task=self.other_task, project=self.other, created_by=self.admin)
+
+
+    def test_every_role_rule_uses_known_conditions(self):
+        print("\nRunning test_every_role_rule_uses_known_conditions...")
+        for (resource, action), rules in POLICY.items():
+            for rule in rules.values():
+                for name in rule:
+                    self.assertIn(name, CONDITIONS[resource], f"{resource}/{action}: {name}")
+        print("✅ Test passed.")
+
+
+    def test_authorized_querysets_follow_roles(self):
+        print("\nRunning test_authorized_querysets_follow_roles...")
+        visible = lambda user: set(authorized(Comment.objects.all(), user, 'view'))
+        self.assertEqual(visible(self.admin), {self.comment, self.tl_comment, self.other_comment})
+        self.assertEqual(visible(self.pm), {self.comment, self.tl_comment})
+        self.assertEqual(visible(self.tl), {self.comment, self.tl_comment})
+        self.assertEqual(visible(self.dev), {self.comment, self.tl_comment})
+
+        updatable = lambda user: set(authorized(Comment.objects.all(), user, 'update'))
+        self.assertEqual(updatable(self.dev), {self.comment})
+        self.assertEqual(set(authorized(Task.objects.all(), self.dev, 'update_status')), {self.task})
+        self.assertEqual(set(authorized(Task.objects.all(), self.pm, 'update_status')), set())
+        print("✅ Test passed.")
+
+
+    def test_batch_check(self):
+        print("\nRunning test_batch_check...")
+        ids = [self.comment.id, self.tl_comment.id, self.other_comment.id, 99999]
+        member_project_ids(self.tl)  # cached after the first lookup
+        with self.assertNumQueries(1):
+            self.assertEqual(allowed_ids(self.tl, 'delete', 'comment', ids), {self.comment.id, self.tl_comment.id})
+        self.assertEqual(allowed_ids(self.admin, 'delete', 'comment', ids),
+                         {self.comment.id, self.tl_comment.id, self.other_comment.id})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        res = self.client.post(reverse('policy-check'), {"resource": "comment", "action": "update", "ids": ids}, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"allowed": [self.comment.id], "denied": sorted(ids[1:])})
+
+        res = self.client.post(reverse('policy-check'), {"resource": "comment", "action": "fly", "ids": ids}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        print("✅ Test passed.")
+
+
+    def test_denied_existing_row_is_403_missing_row_is_404(self):
+        print("\nRunning test_denied_existing_row_is_403_missing_row_is_404...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        res = self.client.delete(reverse('comment-delete', kwargs={'pk': self.tl_comment.id}))
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn("Developers can only delete their own comments", res.data['detail'])
+
+        res = self.client.delete(reverse('comment-delete', kwargs={'pk': 99999}))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.patch(reverse('developer-task-status-update', kwargs={'pk': self.other_task.id}), {"status": "DONE"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(res.data['detail'], "You can only update the status of tasks assigned to you.")
+
+        res = self.client.patch(reverse('developer-task-status-update', kwargs={'pk': self.task.id}), {"status": "DONE"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        print("✅ Test passed.")
+
+
+    def test_project_update_needs_member_pm(self):
+        print("\nRunning test_project_update_needs_member_pm...")
+        # The PM created the project but is not a member of it.
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.pm)}')
+        url = reverse('project-update', kwargs={'id': self.project.id})
+        res = self.client.patch(url, {"name": "Renamed"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.project.members.add(self.pm)
+        res = self.client.patch(url, {"name": "Renamed"})
+        print(f"Response: {res.status_code}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        print("✅ Test passed.")
@@ -0,0 +1,426 @@
+import io
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.utils import timezone
+from core.models import User, Project, ProjectProgress, ReportJob, Task
+from core.report import report_path, store_report
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+
+
+def get_jwt_token_for_user(user):
+    """Helper function to get JWT token for a user"""
+    refresh = RefreshToken.for_user(user)
+    return str(refresh.access_token)
+
+
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProjectProgressReportTests(APITestCase):
+    """Test suite for the project progress report"""
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', name='Admin', role='ADMIN')
+        self.dev = User.objects.create_user(email='dev@example.com', password='devpass', name='Dev', role='DEVELOPER')
+        self.client_user = User.objects.create_user(email='client@example.com', password='clientpass', name='Client', role='CLIENT')
+
+        self.project = Project.objects.create(name='Demo Project', created_by=self.admin)
+        self.project.members.add(self.dev)
+        for title, task_status in [("Plan", "DONE"), ("Build", "IN_PROGRESS"), ("Ship", "TODO")]:
+            Task.objects.create(title=title, status=task_status, project=self.project, created_by=self.admin)
+        self.url = reverse('project-progress-report', kwargs={'pk': self.project.id})
+
+
+    def get_report(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(user)}')
+        res = self.client.get(self.url)
+        if res.status_code == status.HTTP_200_OK:
+            res.report = b''.join(res.streaming_content).decode()
+        return res
+
+
+    def test_member_can_download_report(self):
+        print("\nRunning test_member_can_download_report...")
+        res = self.get_report(self.dev)
+        print(f"Response: {res.status_code}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("Team Members: Dev", res.report)
+        self.assertIn("- Task: Build\n  Status: IN_PROGRESS\n  Points: 5\n", res.report)
+        self.assertIn("Total Tasks: 3\nCompleted Tasks: 1\nIn Progress Tasks: 1\nTo Do Tasks: 1\n", res.report)
+        self.assertIn("Overall Project Progress: 50.0%", res.report)
+        print("✅ Test passed.")
+
+
+    def test_non_member_cannot_download_report(self):
+        print("\nRunning test_non_member_cannot_download_report...")
+        res = self.get_report(self.client_user)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        print("✅ Test passed.")
+
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        print("\nRunning test_query_count_does_not_grow_with_tasks...")
+        self.get_report(self.admin)  # Warms the user cache; the task below makes the report stale again
+        Task.objects.create(title="One more", project=self.project, created_by=self.admin)
+        with CaptureQueriesContext(connection) as small:
+            self.get_report(self.admin)
+        Task.objects.bulk_create(
+            Task(title=f"Bulk {i}", project=self.project, created_by=self.admin) for i in range(200)
+        )
+        call_command('rebuild_counters', self.project.id)  # bulk_create skips the counter signals
+        with CaptureQueriesContext(connection) as large:
+            res = self.get_report(self.admin)
+        self.assertIn("Total Tasks: 204", res.report)
+        self.assertEqual(len(small), len(large))
+        print("✅ Test passed.")
+
+
+class ProjectProgressCounterTests(APITestCase):
+    """Test suite for the materialized per-project task counters"""
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', name='Admin', role='ADMIN')
+        self.project = Project.objects.create(name='Demo Project', created_by=self.admin)
+        self.other = Project.objects.create(name='Other Project', created_by=self.admin)
+
+
+    def counters(self, project):
+        progress = ProjectProgress.objects.get(pk=project.pk)
+        return progress.todo, progress.in_progress, progress.done, progress.total_points
+
+
+    def test_counters_follow_task_writes(self):
+        print("\nRunning test_counters_follow_task_writes...")
+        task = Task.objects.create(title="Build", project=self.project, created_by=self.admin)
+        self.assertEqual(self.counters(self.project), (1, 0, 0, 0))
+
+        task.status = 'DONE'
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        self.assertEqual(self.counters(self.project), (0, 0, 1, 10))
+        counter_updates = [q for q in queries if q['sql'].startswith('UPDATE "core_projectprogress"')]
+        self.assertEqual(len(counter_updates), 1)  # Both buckets in one UPDATE
+
+        with CaptureQueriesContext(connection) as queries:
+            task.title = "Build it"
+            task.save(update_fields=['title', 'updated_at'])
+        # Placement untouched: no lookup of the old row, no counter update.
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and 'FROM "core_task"' in q['sql']])
+        self.assertFalse([q for q in queries if 'core_projectprogress' in q['sql']])
+        self.assertEqual(self.counters(self.project), (0, 0, 1, 10))
+
+        task.project = self.other
+        task.status = 'IN_PROGRESS'
+        task.save()
+        self.assertEqual(self.counters(self.project), (0, 0, 0, 0))
+        self.assertEqual(self.counters(self.other), (0, 1, 0, 5))
+
+        task.delete()
+        self.assertEqual(self.counters(self.other), (0, 0, 0, 0))
+        print("✅ Test passed.")
+
+
+    def test_rebuild_counters_command(self):
+        print("\nRunning test_rebuild_counters_command...")
+        Task.objects.bulk_create([
+            Task(title="Plan", status='DONE', project=self.project, created_by=self.admin),
+            Task(title="Ship", status='TODO', project=self.project, created_by=self.admin),
+        ])  # bulk_create skips the signals, leaving the counters stale
+        self.assertEqual(self.counters(self.project), (0, 0, 0, 0))
+        call_command('rebuild_counters', self.project.id)
+        self.assertEqual(self.counters(self.project), (1, 0, 1, 10))
+        print("✅ Test passed.")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProjectProgressReportCachingTests(APITestCase):
+    """Test suite for stored report versions and conditional GET"""
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', name='Admin', role='ADMIN')
+        self.project = Project.objects.create(name='Demo Project', created_by=self.admin)
+        self.task = Task.objects.create(title="Plan", project=self.project, created_by=self.admin)
+        self.url = reverse('project-progress-report', kwargs={'pk': self.project.id})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.admin)}')
+
+
+    def test_if_none_match_returns_304(self):
+        print("\nRunning test_if_none_match_returns_304...")
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.has_header('Last-Modified'))
+        etag = res['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        print(f"Response: {res.status_code}, queries: {len(queries)}")
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)  # User and membership come from the cache
+        print("✅ Test passed.")
+
+
+    def test_unchanged_project_is_served_from_storage(self):
+        print("\nRunning test_unchanged_project_is_served_from_storage...")
+        first = b''.join(self.client.get(self.url).streaming_content)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.url)
+            second = b''.join(res.streaming_content)
+        self.assertEqual(first, second)
+        self.assertEqual(len(queries), 0)
+        print("✅ Test passed.")
+
+
+    def test_task_change_produces_new_version(self):
+        print("\nRunning test_task_change_produces_new_version...")
+        etag = self.client.get(self.url)['ETag']
+        self.task.status = 'DONE'
+        self.task.save()
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertIn(b"Completed Tasks: 1", b''.join(res.streaming_content))
+        print("✅ Test passed.")
+
+
+    def test_lagging_writer_keeps_newer_version(self):
+        print("\nRunning test_lagging_writer_keeps_newer_version...")
+        older, current, newer = [report_path(self.project.id, version) for version in ('100', '200', '300')]
+        for name in (older, newer):
+            store_report(name, [b"report"])
+        store_report(current, [b"report"])
+
+        self.assertFalse(default_storage.exists(older))
+        self.assertTrue(default_storage.exists(current))
+        self.assertTrue(default_storage.exists(newer))  # Written first by a newer request
+        print("✅ Test passed.")
+
+
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProjectProgressReportJobTests(APITestCase):
+    """Test suite for background PDF progress reports"""
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', name='Admin', role='ADMIN')
+        self.dev = User.objects.create_user(email='dev@example.com', password='devpass', name='Dev', role='DEVELOPER')
+        self.client_user = User.objects.create_user(email='client@example.com', password='clientpass', name='Client', role='CLIENT')
+
+        self.project = Project.objects.create(name='Demo Project', created_by=self.admin)
+        self.project.members.add(self.dev)
+        Task.objects.create(title="Plan", status="DONE", project=self.project, created_by=self.admin)
+        self.url = reverse('project-progress-report-pdf', kwargs={'pk': self.project.id})
+
+
+    def request_report(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(user)}')
+        return self.client.post(self.url)
+
+
+    def test_request_returns_job_and_worker_renders_pdf(self):
+        print("\nRunning test_request_returns_job_and_worker_renders_pdf...")
+        res = self.request_report(self.dev)
+        print(f"Response: {res.status_code} {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], ReportJob.PENDING)
+        self.assertNotIn('download_url', res.data)
+
+        download_url = reverse('report-job-download', args=[res.data['job_id']])
+        self.assertEqual(self.client.get(download_url).status_code, status.HTTP_409_CONFLICT)
+
+        call_command('run_report_jobs', processes=0, stdout=open('/dev/null', 'w'))
+
+        job = self.client.get(res.data['status_url'])
+        self.assertEqual(job.data['status'], ReportJob.DONE)
+        self.assertTrue(job.data['download_url'].endswith(download_url))
+
+        pdf = self.client.get(download_url)
+        self.assertEqual(pdf.status_code, status.HTTP_200_OK)
+        self.assertEqual(pdf['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(pdf.streaming_content).startswith(b'%PDF'))
+
+        not_modified = self.client.get(download_url, HTTP_IF_NONE_MATCH=pdf['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        print("✅ Test passed.")
+
+
+    def test_unchanged_project_reuses_job(self):
+        print("\nRunning test_unchanged_project_reuses_job...")
+        first = self.request_report(self.dev)
+        second = self.request_report(self.admin)
+        self.assertEqual(first.data['job_id'], second.data['job_id'])
+
+        Task.objects.create(title="Ship", status="TODO", project=self.project, created_by=self.admin)
+        third = self.request_report(self.dev)
+        print(f"Response: {third.status_code} {third.data}")
+        self.assertNotEqual(first.data['job_id'], third.data['job_id'])
+        self.assertEqual(ReportJob.objects.count(), 2)
+        print("✅ Test passed.")
+
+
+    def test_non_member_cannot_request_or_fetch_report(self):
+        print("\nRunning test_non_member_cannot_request_or_fetch_report...")
+        res = self.request_report(self.client_user)
+        print(f"Response: {res.status_code}")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        job_id = self.request_report(self.dev).data['job_id']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.client_user)}')
+        res = self.client.get(reverse('report-job-detail', args=[job_id]))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        print("✅ Test passed.")
+
+
+    def test_stalled_job_is_requeued(self):
+        print("\nRunning test_stalled_job_is_requeued...")
+        job_id = self.request_report(self.dev).data['job_id']
+        ReportJob.objects.filter(pk=job_id).update(state=ReportJob.RUNNING, started_at=timezone.now() - timedelta(hours=1))
+
+        call_command('run_report_jobs', processes=0, stdout=open('/dev/null', 'w'))
+        self.assertEqual(ReportJob.objects.get(pk=job_id).state, ReportJob.DONE)
+        print("✅ Test passed.")
+
+
+    def test_done_job_without_file_is_requeued(self):
+        print("\nRunning test_done_job_without_file_is_requeued...")
+        job_id = self.request_report(self.dev).data['job_id']
+        call_command('run_report_jobs', processes=0, stdout=open('/dev/null', 'w'))
+        default_storage.delete(ReportJob.objects.get(pk=job_id).file)
+
+        res = self.request_report(self.dev)
+        print(f"Response: {res.status_code} {res.data}")
+        self.assertEqual(res.data['job_id'], job_id)
+        self.assertEqual(res.data['status'], ReportJob.PENDING)
+
+        call_command('run_report_jobs', processes=0, stdout=open('/dev/null', 'w'))
+        job = ReportJob.objects.get(pk=job_id)
+        self.assertEqual(job.state, ReportJob.DONE)
+        self.assertTrue(default_storage.exists(job.file))
+        print("✅ Test passed.")
+
+
+
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProgressReportExportTests(APITestCase):
+    """Test suite for the bulk progress report export"""
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', password='adminpass', name='Admin', role='ADMIN')
+        self.manager = User.objects.create_user(email='pm@example.com', password='pmpass', name='PM', role='PROJECT_MANAGER')
+
+        self.projects = []
+        for name in ["Alpha", "Beta", "Gamma"]:
+            project = Project.objects.create(name=name, created_by=self.admin)
+            project.members.add(self.manager)
+            Task.objects.create(title=f"{name} task", status="DONE", project=project, created_by=self.admin)
+            self.projects.append(project)
+        self.url = reverse('progress-report-export')
+
+
+    def read_zip(self, res):
+        return zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+
+
+    def export(self, params=None):
+        """GET the export; if reports were queued, run the worker and GET again."""
+        res = self.client.get(self.url, params)
+        if res.status_code == status.HTTP_202_ACCEPTED:
+            call_command('run_report_jobs', processes=0, stdout=open('/dev/null', 'w'))
+            res = self.client.get(self.url, params)
+        return res
+
+
+    def single_report(self, project):
+        res = self.client.get(reverse('project-progress-report', kwargs={'pk': project.id}))
+        return b''.join(res.streaming_content)
+
+
+    def test_export_matches_per_project_reports(self):
+        print("\nRunning test_export_matches_per_project_reports...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.admin)}')
+        res = self.export()
+        print(f"Response: {res.status_code}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/zip')
+
+        archive = self.read_zip(res)
+        self.assertEqual(len(archive.namelist()), 3)
+        for project in self.projects:
+            content = archive.read(f"project_{project.id}_progress_report.txt")
+            self.assertEqual(content, self.single_report(project))
+        print("✅ Test passed.")
+
+
+    def test_export_filtered_projects(self):
+        print("\nRunning test_export_filtered_projects...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.admin)}')
+        alpha, beta, gamma = self.projects
+
+        res = self.export({'ids': f"{alpha.id},{gamma.id}"})
+        self.assertEqual(sorted(self.read_zip(res).namelist()), [
+            f"project_{alpha.id}_progress_report.txt", f"project_{gamma.id}_progress_report.txt",
+        ])
+
+        res = self.export({'name': 'bet'})
+        self.assertEqual(self.read_zip(res).namelist(), [f"project_{beta.id}_progress_report.txt"])
+
+        res = self.client.get(self.url, {'name': 'nothing'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        print("✅ Test passed.")
+
+
+    def test_missing_reports_are_queued(self):
+        print("\nRunning test_missing_reports_are_queued...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.admin)}')
+        alpha = self.projects[0]
+        self.single_report(alpha)  # Stored by the per-project download
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.url)
+        print(f"Response: {res.status_code} {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual([job['project'] for job in res.data['jobs']], [p.id for p in self.projects[1:]])
+        self.assertFalse([q for q in queries if 'core_task' in q['sql']])  # Nothing rendered inline
+
+        # Asking again reuses the queued jobs.
+        again = self.client.get(self.url)
+        self.assertEqual([job['job_id'] for job in again.data['jobs']], [job['job_id'] for job in res.data['jobs']])
+
+        call_command('run_report_jobs', processes=0, stdout=open('/dev/null', 'w'))
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.read_zip(res).namelist()), 3)
+
+        download = self.client.get(reverse('report-job-download', args=[again.data['jobs'][0]['job_id']]))
+        self.assertEqual(download['Content-Type'], 'text/plain')
+        print("✅ Test passed.")
+
+
+    def test_non_admin_cannot_export(self):
+        print("\nRunning test_non_admin_cannot_export...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.manager)}')
+        res = self.client.get(self.url)
+        print(f"Response: {res.status_code}")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        print("✅ Test passed.")
+
+
+    def test_export_command(self):
+        print("\nRunning test_export_command...")
+        output = os.path.join(tempfile.mkdtemp(), 'reports.zip')
+        call_command('export_reports', self.projects[0].id, processes=0, output=output, stdout=io.StringIO())
+
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(archive.namelist(), [f"project_{self.projects[0].id}_progress_report.txt"])
+            self.assertIn("Project Progress Report: Alpha", archive.read(archive.namelist()[0]).decode())
+        print("✅ Test passed.")
@@ -1,5 +1,7 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from core.models import User, Project
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -189,3 +191,135 @@ class ProjectEdgeCases(ProjectTestSetup):
         print("✅ Test passed.")
 
 
+class ProjectMemberTests(ProjectTestSetup):
+    def setUp(self):
+        super().setUp()
+        self.others = [
+            User.objects.create_user(email=f'dev{n}@example.com', password='devpass', name=f'Dev {n}', role='DEVELOPER')
+            for n in range(3)
+        ]
+        self.add_url = reverse('project-add-members', kwargs={'id': self.project.id})
+        self.remove_url = reverse('project-remove-members', kwargs={'id': self.project.id})
+        token = get_jwt_token_for_user(self.pm)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+    def member_ids(self):
+        return set(self.project.members.values_list('id', flat=True))
+
+
+    def test_add_members_writes_only_new_rows(self):
+        print("\nRunning test_add_members_writes_only_new_rows...")
+        ids = [self.dev.id, self.others[0].id, self.others[1].id, self.others[0].id]  # Repeats are dropped
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(self.add_url, {"members": ids}, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(res.data['members'], sorted([self.others[0].id, self.others[1].id]))
+        self.assertEqual(self.member_ids(), {self.pm.id, self.dev.id, self.others[0].id, self.others[1].id})
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT') and 'INTO "core_project_members"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse([q for q in queries if q['sql'].startswith('DELETE')])
+        reads = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "core_project_members"' in q['sql']
+                 and '"core_project_members"."project_id" =' in q['sql']]
+        self.assertEqual(len(reads), 1)  # The current rows are read once
+
+        # The new member's cached memberships were dropped.
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.others[0])}')
+        res = self.client.get(reverse('project-list-create'))
+        self.assertEqual([project['id'] for project in res.data['results']], [self.project.id])
+        print("✅ Test passed.")
+
+
+    def test_remove_members(self):
+        print("\nRunning test_remove_members...")
+        res = self.client.post(self.remove_url, {"members": [self.dev.id, self.others[2].id]}, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(res.data['members'], [self.dev.id])  # Only actual members are removed
+        self.assertEqual(res.data['message'], "1 members removed.")
+        self.assertEqual(self.member_ids(), {self.pm.id})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        res = self.client.get(reverse('project-list-create'))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)  # No projects left
+        print("✅ Test passed.")
+
+
+    def test_member_changes_are_validated(self):
+        print("\nRunning test_member_changes_are_validated...")
+        res = self.client.post(self.add_url, {"members": [self.others[0].id, 999]}, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)  # Expected: 400 Bad Request
+        self.assertEqual(res.data['members'], ['Invalid pk "999" - object does not exist.'])
+        res = self.client.post(self.add_url, {"members": []}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.member_ids(), {self.pm.id, self.dev.id})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        res = self.client.post(self.add_url, {"members": [self.others[0].id]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)  # Expected: 403 Forbidden
+        print("✅ Test passed.")
+
+
+    def test_put_resolves_members_in_one_query(self):
+        print("\nRunning test_put_resolves_members_in_one_query...")
+        ids = [self.pm.id] + [user.id for user in self.others]
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.put(reverse('project-update', kwargs={'id': self.project.id}),
+                                  {"name": "Demo Project", "members": ids}, format='json')
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(self.member_ids(), set(ids))
+        lookups = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "core_user"' in q['sql']
+                   and '"core_user"."id" IN' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+        print("✅ Test passed.")
+
+
+    def test_omitting_members_skips_their_query(self):
+        print("\nRunning test_omitting_members_skips_their_query...")
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse('project-list-create'), {'omit': 'members,description,updated_at'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(set(res.data['results'][0]), {'id', 'name', 'created_by', 'created_at'})
+        self.assertFalse([q for q in queries if 'core_project_members"."project_id" =' in q['sql']])
+        print("✅ Test passed.")
+
+
+    def test_expand_members_is_prefetched(self):
+        print("\nRunning test_expand_members_is_prefetched...")
+        for n in range(3):
+            project = Project.objects.create(name=f'Extra {n}', created_by=self.admin)
+            project.members.add(self.pm, *self.others)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse('project-list-create'), {'expand': 'members,created_by'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(len(res.data['results']), 4)
+        first = res.data['results'][0]
+        self.assertEqual(first['created_by'], {'id': self.admin.id, 'name': 'Admin', 'role': 'ADMIN'})
+        self.assertIn({'id': self.pm.id, 'name': 'Project Manager', 'role': 'PROJECT_MANAGER'}, first['members'])
+        member_queries = [q for q in queries if 'FROM "core_user" INNER JOIN "core_project_members"' in q['sql']]
+        self.assertEqual(len(member_queries), 1)  # One prefetch for the whole page
+        print("✅ Test passed.")
+
+
+
+    def test_member_changes_move_the_detail_etag(self):
+        print("\nRunning test_member_changes_move_the_detail_etag...")
+        url = reverse('project-detail', kwargs={'pk': self.project.id})
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        etag = res['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Membership rows don't save the project; the signal moves updated_at.
+        self.client.post(self.add_url, {"members": [self.others[0].id]}, format='json')
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertIn(self.others[0].id, res.data['members'])
+        self.assertNotEqual(res['ETag'], etag)
+        print("✅ Test passed.")
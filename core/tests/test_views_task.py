@@ -1,7 +1,15 @@
+import base64
+import json
+import warnings
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from core.models import User, Project, Task
+from core.models import User, Project, Task, Comment
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
@@ -145,3 +153,482 @@ class TaskListCreateTests(ProjectTestSetup):
         print("✅ Test passed.")
 
 
+
+
+class TaskListPaginationTests(ProjectTestSetup):
+    """Test suite for cursor pagination on the task list"""
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('task-list')
+        self.tasks = [
+            Task.objects.create(title=f"Task {i}", project=self.project, created_by=self.admin)
+            for i in range(5)
+        ]
+
+
+    def test_admin_can_walk_task_pages(self):
+        print("\nRunning test_admin_can_walk_task_pages...")
+        token = get_jwt_token_for_user(self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        seen = []
+        url = f"{self.url}?page_size=2"
+        while url:
+            res = self.client.get(url)
+            print(f"Response: {res.status_code}, {res.data}")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(task['id'] for task in res.data['results'])
+            previous, url = res.data['previous'], res.data['next']
+        self.assertEqual(seen, [task.id for task in self.tasks])
+
+        res = self.client.get(previous)
+        self.assertEqual([task['id'] for task in res.data['results']], seen[2:4])
+        print("✅ Test passed.")
+
+
+    def test_invalid_cursor_returns_404(self):
+        print("\nRunning test_invalid_cursor_returns_404...")
+        token = get_jwt_token_for_user(self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        res = self.client.get(f"{self.url}?cursor=not-a-cursor")
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)  # Expected: 404 Not Found
+        print("✅ Test passed.")
+
+
+    def test_naive_cursor_is_read_as_utc(self):
+        print("\nRunning test_naive_cursor_is_read_as_utc...")
+        token = get_jwt_token_for_user(self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        first = Task.objects.order_by('created_at', 'id').first()
+        naive = first.created_at.replace(tzinfo=None).isoformat()
+        cursor = base64.urlsafe_b64encode(json.dumps([naive, first.id, 0]).encode()).decode().rstrip('=')
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)  # No naive datetime reaches the query
+            res = self.client.get(self.url, {'cursor': cursor})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertNotIn(first.id, [task['id'] for task in res.data['results']])
+        print("✅ Test passed.")
+
+
+class TaskListCacheInvalidationTests(ProjectTestSetup):
+    """Test suite for write-aware invalidation of cached task responses"""
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(title="Cached Task", project=self.project, assigned_to=self.dev, created_by=self.admin)
+
+
+    def test_update_is_visible_in_cached_list(self):
+        print("\nRunning test_update_is_visible_in_cached_list...")
+        token = get_jwt_token_for_user(self.dev)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        res = self.client.get(reverse('task-detail', kwargs={'pk': self.task.id}))
+        self.assertEqual(res.data['status'], 'TODO')
+
+        res = self.client.patch(reverse('developer-task-status-update', kwargs={'pk': self.task.id}), {"status": "DONE"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+
+        res = self.client.get(reverse('task-detail', kwargs={'pk': self.task.id}))
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.data['status'], 'DONE')
+        print("✅ Test passed.")
+
+
+class TaskListCacheKeyTests(ProjectTestSetup):
+    """Test suite for identity-scoped response cache keys"""
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('task-list')
+        self.other_admin = User.objects.create_user(
+            email='admin2@example.com', password='adminpass', name='Admin 2', role='ADMIN'
+        )
+        Task.objects.create(title="Shared Task", project=self.project, created_by=self.admin)
+
+
+    def test_admins_share_cached_list(self):
+        print("\nRunning test_admins_share_cached_list...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.admin)}')
+        self.client.get(self.url)
+
+        # Bypasses the save signals, so only a cache hit still shows the old title.
+        Task.objects.update(title="Renamed Task")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.other_admin)}')
+        res = self.client.get(self.url)
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.data['results'][0]['title'], "Shared Task")
+        print("✅ Test passed.")
+
+
+    def test_different_membership_does_not_share(self):
+        print("\nRunning test_different_membership_does_not_share...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.dev)}')
+        self.client.get(self.url)
+
+        outsider = User.objects.create_user(email='dev2@example.com', password='devpass', name='Dev 2', role='DEVELOPER')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(outsider)}')
+        res = self.client.get(self.url)
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)  # Expected: 404 Not Found
+        print("✅ Test passed.")
+
+
+
+
+class TaskTitleUniquenessTests(ProjectTestSetup):
+    """Test suite for the (project, title) unique constraint"""
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(title="Sample Task", project=self.project, created_by=self.admin)
+        self.other_project = Project.objects.create(name='Other Project', created_by=self.admin)
+        token = get_jwt_token_for_user(self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+    def create(self, title, project):
+        return self.client.post(reverse('task-create'), {"title": title, "description": "d", "project": project.id})
+
+
+    def test_duplicate_title_is_rejected(self):
+        print("\nRunning test_duplicate_title_is_rejected...")
+        res = self.create("Sample Task", self.project)
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data, ["A task with this title already exists in the project."])
+        self.assertEqual(Task.objects.filter(title="Sample Task").count(), 1)
+
+        res = self.create("Sample Task", self.other_project)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)  # Same title, other project
+        print("✅ Test passed.")
+
+
+    def test_rename_to_existing_title_is_rejected(self):
+        print("\nRunning test_rename_to_existing_title_is_rejected...")
+        other = Task.objects.create(title="Other Task", project=self.project, created_by=self.admin)
+        res = self.client.patch(reverse('task-update', kwargs={'pk': other.id}), {"title": "Sample Task"})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data, ["A task with this title already exists in the project."])
+
+        res = self.client.patch(reverse('task-update', kwargs={'pk': other.id}), {"title": "Other Task", "status": "DONE"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Keeping its own title is fine
+        print("✅ Test passed.")
+
+
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class TaskIndexPlanTests(ProjectTestSetup):
+    """Test suite checking the list access paths use the composite indexes"""
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return " ".join(row[-1] for row in cursor.fetchall())
+
+
+    def test_access_paths_use_composite_indexes(self):
+        print("\nRunning test_access_paths_use_composite_indexes...")
+        plans = {
+            'task_project_status_idx': Task.objects.filter(project_id__in=[self.project.id], status='TODO'),
+            'task_assignee_status_idx': Task.objects.filter(assigned_to=self.dev, status='TODO'),
+            'comment_task_created_idx': Comment.objects.filter(task_id=1).order_by('created_at'),
+            'comment_project_created_idx': Comment.objects.filter(project_id=self.project.id).order_by('created_at'),
+        }
+        for index, queryset in plans.items():
+            plan = self.plan(queryset)
+            print(f"{index}: {plan}")
+            self.assertIn(index, plan)
+        print("✅ Test passed.")
+
+
+
+
+class TaskSparseFieldsetTests(ProjectTestSetup):
+    """Test suite for ?fields= / ?omit= on tasks"""
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('task-list')
+        self.task = Task.objects.create(
+            title="Board Task", description="A long description " * 50, project=self.project,
+            assigned_to=self.dev, created_by=self.admin,
+        )
+        token = get_jwt_token_for_user(self.pm)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+    def task_queries(self, queries):
+        return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "core_task"' in q['sql']]
+
+
+    def test_fields_selects_only_those_columns(self):
+        print("\nRunning test_fields_selects_only_those_columns...")
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.url, {'fields': 'id,title,status,assigned_to'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(res.data['results'][0], {
+            'id': self.task.id, 'title': "Board Task", 'status': 'TODO', 'assigned_to': self.dev.id,
+        })
+        task_queries = self.task_queries(queries)
+        self.assertEqual(len(task_queries), 1)  # No deferred column is loaded afterwards
+        self.assertNotIn('"description"', task_queries[0])
+        print("✅ Test passed.")
+
+
+    def test_omit_drops_fields(self):
+        print("\nRunning test_omit_drops_fields...")
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse('task-detail', kwargs={'pk': self.task.id}), {'omit': 'description'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertNotIn('description', res.data)
+        self.assertEqual(res.data['title'], "Board Task")
+        self.assertNotIn('"description"', self.task_queries(queries)[0])
+        print("✅ Test passed.")
+
+
+    def test_unknown_field_is_rejected(self):
+        print("\nRunning test_unknown_field_is_rejected...")
+        res = self.client.get(self.url, {'fields': 'id,secret'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)  # Expected: 400 Bad Request
+        self.assertEqual(res.data, {'fields': ["Unknown field(s): secret."]})
+        res = self.client.get(self.url, {'fields': 'id', 'omit': 'id'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        print("✅ Test passed.")
+
+
+    def test_each_fieldset_is_cached_separately(self):
+        print("\nRunning test_each_fieldset_is_cached_separately...")
+        sparse = self.client.get(self.url, {'fields': 'id,title'})
+        full = self.client.get(self.url)
+        sparse_again = self.client.get(self.url, {'fields': 'id,title'})
+        print(f"Response: {full.status_code}, {full.data}")
+        self.assertEqual(set(sparse.data['results'][0]), {'id', 'title'})
+        self.assertIn('description', full.data['results'][0])
+        self.assertEqual(sparse_again.data, sparse.data)
+        print("✅ Test passed.")
+
+
+
+
+class TaskExpandTests(ProjectTestSetup):
+    """Test suite for ?expand= on tasks"""
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('task-list')
+        token = get_jwt_token_for_user(self.pm)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+    def create_tasks(self, count, start=0):
+        for n in range(start, start + count):
+            Task.objects.create(title=f"Task {n}", description="d", project=self.project, assigned_to=self.dev, created_by=self.admin)
+
+
+    def test_expand_inlines_relations(self):
+        print("\nRunning test_expand_inlines_relations...")
+        self.create_tasks(1)
+        res = self.client.get(self.url, {'expand': 'assigned_to,project,created_by'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        task = res.data['results'][0]
+        self.assertEqual(task['assigned_to'], {'id': self.dev.id, 'name': 'Developer', 'role': 'DEVELOPER'})
+        self.assertEqual(task['project'], {'id': self.project.id, 'name': 'Demo Project'})
+        self.assertEqual(task['created_by']['name'], 'Admin')
+
+        res = self.client.get(self.url, {'expand': 'project', 'fields': 'id,title,project'})
+        self.assertEqual(res.data['results'][0], {'id': task['id'], 'title': "Task 0", 'project': task['project']})
+        print("✅ Test passed.")
+
+
+    def test_expand_query_count_does_not_grow_with_page_size(self):
+        print("\nRunning test_expand_query_count_does_not_grow_with_page_size...")
+        self.create_tasks(2)
+        self.client.get(self.url)  # Warms the user and generation caches
+        with CaptureQueriesContext(connection) as small:
+            res = self.client.get(self.url, {'expand': 'assigned_to,project', 'page_size': 50})
+        self.assertEqual(len(res.data['results']), 2)
+        self.create_tasks(30, start=2)
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.get(self.url, {'expand': 'assigned_to,project', 'page_size': 50})
+        self.assertEqual(len(res.data['results']), 32)
+        print(f"Queries: 2 tasks -> {len(small)}, 32 tasks -> {len(large)}")
+        self.assertEqual(len(small), len(large))
+        print("✅ Test passed.")
+
+
+    def test_expand_unknown_relation(self):
+        print("\nRunning test_expand_unknown_relation...")
+        res = self.client.get(self.url, {'expand': 'description'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)  # Expected: 400 Bad Request
+        self.assertEqual(res.data, {'expand': ["Can't expand: description."]})
+        print("✅ Test passed.")
+
+
+
+
+class TaskListFastPathTests(ProjectTestSetup):
+    """Test suite for the .values() read path of the task list"""
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('task-list')
+        for n in range(5):
+            Task.objects.create(
+                title=f"Tâche {n} \u2028 \"quoted\" 漢字", description="Line one\nLine two\t😀", project=self.project,
+                assigned_to=self.dev if n % 2 else None, status=['TODO', 'IN_PROGRESS', 'DONE'][n % 3], created_by=self.admin,
+            )
+        token = get_jwt_token_for_user(self.pm)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+    def pages(self, params):
+        """Raw bodies of every page, following the next links."""
+        bodies, url = [], self.url
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            bodies.append(res.content)
+            url, params = res.json()['next'], None
+        return bodies
+
+
+    def assert_same_bytes(self, params):
+        with mock.patch('core.serializers.TaskSerializer.to_representation') as to_representation:
+            fast = self.pages(params)
+        self.assertFalse(to_representation.called)  # No serializer per row
+        cache.clear()
+        with mock.patch('core.fastpath.row_mapper', return_value=None):
+            slow = self.pages(params)
+        print(f"Response: {fast[0][:200]}")
+        self.assertEqual(fast, slow)
+
+
+    def test_fast_path_matches_serializer_bytes(self):
+        print("\nRunning test_fast_path_matches_serializer_bytes...")
+        self.assert_same_bytes({'page_size': 2})
+        cache.clear()
+        self.assert_same_bytes({'fields': 'id,title,assigned_to,created_at', 'page_size': 3})
+        print("✅ Test passed.")
+
+
+    def test_expand_takes_the_serializer(self):
+        print("\nRunning test_expand_takes_the_serializer...")
+        res = self.client.get(self.url, {'expand': 'project'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.data['results'][0]['project'], {'id': self.project.id, 'name': 'Demo Project'})
+        print("✅ Test passed.")
+
+
+    def test_fast_renderer_matches_json_renderer(self):
+        print("\nRunning test_fast_renderer_matches_json_renderer...")
+        from rest_framework.renderers import JSONRenderer
+        from core.fastpath import FastJSONRenderer
+        data = {'text': ''.join(map(chr, range(0x80))) + '\u2028\u2029é漢😀', 'n': None, 'big': 2 ** 70, 'list': [True, -1]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        print("✅ Test passed.")
+
+
+
+class TaskConditionalGetTests(ProjectTestSetup):
+    """Test suite for ETag / Last-Modified on task reads"""
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(title="Polled Task", project=self.project, assigned_to=self.dev, created_by=self.admin)
+        self.detail_url = reverse('task-detail', kwargs={'pk': self.task.id})
+        token = get_jwt_token_for_user(self.dev)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+    def task_queries(self, queries):
+        return [q['sql'] for q in queries if 'FROM "core_task"' in q['sql']]
+
+
+    def test_unchanged_detail_is_not_modified(self):
+        print("\nRunning test_unchanged_detail_is_not_modified...")
+        res = self.client.get(self.detail_url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        etag = res['ETag']
+        self.assertIn('Last-Modified', res)
+
+        cache.clear()  # Past the response cache: the view answers from the validators alone.
+        self.client.get(reverse('task-list'))  # Warm the user and membership caches
+        with mock.patch('core.serializers.TaskSerializer.to_representation') as to_representation, \
+                CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        print(f"Response: {res.status_code}, {dict(res.headers)}")
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)  # Expected: 304 Not Modified
+        self.assertEqual(res['ETag'], etag)
+        self.assertFalse(to_representation.called)
+        self.assertEqual(len(self.task_queries(queries)), 1)  # The updated_at lookup
+
+        # From the cached response's validators, without touching the table.
+        self.client.get(self.detail_url)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)  # Expected: 304 Not Modified
+        self.assertFalse(self.task_queries(queries))
+
+        res = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)  # Expected: 304 Not Modified
+        print("✅ Test passed.")
+
+
+    def test_status_changes_move_the_etag(self):
+        print("\nRunning test_status_changes_move_the_etag...")
+        etag = self.client.get(self.detail_url)['ETag']
+        res = self.client.patch(reverse('developer-task-status-update', kwargs={'pk': self.task.id}), {"status": "IN_PROGRESS"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+
+        res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(res.data['status'], 'IN_PROGRESS')
+        etag = res['ETag']
+
+        # The batch endpoint writes with UPDATE, not save().
+        res = self.client.patch(reverse('task-bulk-status-update'), [{"id": self.task.id, "status": "DONE"}], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(res.data['status'], 'DONE')
+        self.assertNotEqual(res['ETag'], etag)
+        print("✅ Test passed.")
+
+
+    def test_list_etag_follows_writes(self):
+        print("\nRunning test_list_etag_follows_writes...")
+        other = Task.objects.create(title="Second Task", project=self.project, created_by=self.admin)
+        url = reverse('task-list')
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'page_size': 5})
+        etag = res['ETag']
+        self.assertNotIn('Last-Modified', res)
+        self.assertEqual(len(self.task_queries(queries)), 1)  # Just the page: the ETag takes no query
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'page_size': 5}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)  # Expected: 304 Not Modified
+        self.assertFalse(self.task_queries(queries))
+
+        # Another page or field set is another representation.
+        res = self.client.get(url, {'fields': 'id,title'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+
+        other.delete()
+        res = self.client.get(url, {'page_size': 5}, HTTP_IF_NONE_MATCH=etag)
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertEqual(len(res.data['results']), 1)
+        print("✅ Test passed.")
+
+
+    def test_expanded_reads_carry_no_validators(self):
+        print("\nRunning test_expanded_reads_carry_no_validators...")
+        res = self.client.get(self.detail_url, {'expand': 'assigned_to'})
+        print(f"Response: {res.status_code}, {res.data}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)  # Expected: 200 OK
+        self.assertNotIn('ETag', res)
+        print("✅ Test passed.")
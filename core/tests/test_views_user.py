@@ -1,6 +1,14 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
+from core.authentication import AUTH_USER_KEY, forget_cached_user
 from core.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -220,3 +228,109 @@ class InvalidUserOperationsTest(BaseTestSetup):
         print("Status:", res.status_code)
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
         print("✅ Test passed.")
+
+
+
+
+class CachedAuthenticationTest(BaseTestSetup):
+    """Test suite for JWT authentication backed by the cached user record"""
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse('cache-stats')  # Admin-only and queries nothing but the user
+
+
+    def get_as(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(user)}')
+        return self.client.get(self.url)
+
+
+    def test_user_is_loaded_once(self):
+        print("\nRunning test_user_is_loaded_once...")
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.get_as(self.admin).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as second:
+            self.assertEqual(self.get_as(self.admin).status_code, status.HTTP_200_OK)
+        print("Queries:", len(first), len(second))
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 0)
+        print("✅ Test passed.")
+
+
+    def test_worker_copy_fronts_the_shared_record(self):
+        print("\nRunning test_worker_copy_fronts_the_shared_record...")
+        self.assertEqual(self.get_as(self.admin).status_code, status.HTTP_200_OK)
+
+        cache.delete(AUTH_USER_KEY.format(self.admin.pk))  # Gone from the shared cache only
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_as(self.admin).status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 0)
+
+        forget_cached_user(self.admin.pk)  # Evicts the worker's copy too
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_as(self.admin).status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        print("✅ Test passed.")
+
+
+    def test_other_workers_see_a_change_within_the_local_timeout(self):
+        print("\nRunning test_other_workers_see_a_change_within_the_local_timeout...")
+        self.assertEqual(self.get_as(self.admin).status_code, status.HTTP_200_OK)
+
+        # Deactivated by another worker: its post_save drops the shared record
+        # and that worker's copy, not the one held here.
+        User.objects.filter(pk=self.admin.pk).update(is_active=False)
+        cache.delete(AUTH_USER_KEY.format(self.admin.pk))
+        res = self.get_as(self.admin)
+        print("Status within the window:", res.status_code)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        later = time.time() + settings.AUTH_USER_LOCAL_TIMEOUT + 1
+        with mock.patch('core.cache_backends.time.time', return_value=later):
+            res = self.get_as(self.admin)
+        print("Status after the window:", res.status_code)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        print("✅ Test passed.")
+
+
+    def test_role_change_applies_to_next_request(self):
+        print("\nRunning test_role_change_applies_to_next_request...")
+        self.assertEqual(self.get_as(self.developer).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.admin)}')
+        res = self.client.patch(reverse('admin-update-user', kwargs={'id': self.developer.id}), {"role": "ADMIN"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.get_as(self.developer)  # Same token, still claiming DEVELOPER
+        print("Status:", res.status_code)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        print("✅ Test passed.")
+
+
+    def test_deactivated_or_deleted_user_is_rejected(self):
+        print("\nRunning test_deactivated_or_deleted_user_is_rejected...")
+        self.assertEqual(self.get_as(self.admin).status_code, status.HTTP_200_OK)
+        token = get_jwt_token_for_user(self.admin)
+
+        self.admin.is_active = False
+        self.admin.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        res = self.client.get(self.url)
+        print("Status:", res.status_code)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.admin.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        print("✅ Test passed.")
+
+
+    def test_self_update_keeps_password(self):
+        print("\nRunning test_self_update_keeps_password...")
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_jwt_token_for_user(self.developer)}')
+        res = self.client.patch(reverse('user-self-update'), {"name": "Renamed"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.developer.refresh_from_db()
+        self.assertEqual(self.developer.name, "Renamed")
+        self.assertTrue(self.developer.check_password('devpass'))
+        print("✅ Test passed.")
@@ -5,13 +5,14 @@ from .views import (
     CreateUserView, CustomLoginView,
     ListUsersView, RetrieveUserView,
     AdminUpdateUserView, UserSelfUpdateView,
-    UserDeleteView, ProjectDetailView, ProjectListCreateView, ProjectDeleteView, ProjectUpdateView, TaskListView,
+    UserDeleteView, ProjectDetailView, ProjectListCreateView, ProjectDeleteView, ProjectUpdateView, ProjectMembersView, TaskListView,
     TaskCreateView,
     TaskDetailView,
     TaskUpdateView,
     TaskDeleteView, CommentCreateView, CommentDeleteView, CommentListView, DeveloperTaskStatusUpdateView,
-    CommentUpdateView )
-from core.report import ProjectProgressReportView
+    CommentUpdateView, CacheStatsView, PolicyCheckView )
+from core.bulk import TaskBulkView, TaskStatusBatchView
+from core.report import ProjectProgressReportView, ProjectProgressReportJobView, ReportJobDetailView, ReportJobDownloadView, ProgressReportExportView
 
 urlpatterns = [
     path('login/', CustomLoginView.as_view(), name='token_obtain_pair'), #POST
@@ -23,11 +24,20 @@ urlpatterns = [
 
     path('users/me/', UserSelfUpdateView.as_view(), name='user-self-update'),  # PUT by user / GET / PATCH
 
+    path('permissions/check/', PolicyCheckView.as_view(), name='policy-check'),  # POST: batch permission check
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),  # GET (admin)
+
     path('projects/', ProjectListCreateView.as_view(), name='project-list-create'),
     path('projects/<int:pk>/', ProjectDetailView.as_view(), name='project-detail'),
     path('projects/<int:pk>/delete/', ProjectDeleteView.as_view(), name='project-delete'),
     path('projects/<int:id>/update/', ProjectUpdateView.as_view(), name='project-update'),
+    path('projects/<int:id>/add-members/', ProjectMembersView.as_view(operation='add'), name='project-add-members'),  # POST {"members": [...]}
+    path('projects/<int:id>/remove-members/', ProjectMembersView.as_view(operation='remove'), name='project-remove-members'),  # POST {"members": [...]}
     path('projects/<int:pk>/progress-report/', ProjectProgressReportView.as_view(), name='project-progress-report'),
+    path('projects/<int:pk>/progress-report/pdf/', ProjectProgressReportJobView.as_view(), name='project-progress-report-pdf'),  # POST -> job id
+    path('reports/progress/export/', ProgressReportExportView.as_view(), name='progress-report-export'),  # GET (admin) -> ZIP
+    path('reports/jobs/<uuid:job_id>/', ReportJobDetailView.as_view(), name='report-job-detail'),  # GET
+    path('reports/jobs/<uuid:job_id>/download/', ReportJobDownloadView.as_view(), name='report-job-download'),  # GET
 
 
 
@@ -35,6 +45,8 @@ urlpatterns = [
 
     path('tasks/', TaskListView.as_view(), name='task-list'),
     path('tasks/create/', TaskCreateView.as_view(), name='task-create'),
+    path('tasks/bulk/', TaskBulkView.as_view(), name='task-bulk'),  # POST create / PATCH update / DELETE {"ids": [...]}
+    path('tasks/bulk/update-status/', TaskStatusBatchView.as_view(), name='task-bulk-status-update'),  # Developer: PATCH [{"id", "status"}, ...]
     path('tasks/<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
     path('tasks/<int:pk>/update/', TaskUpdateView.as_view(), name='task-update'),
     path('tasks/<int:pk>/delete/', TaskDeleteView.as_view(), name='task-delete'),
@@ -6,16 +6,25 @@ from .serializers import (
     UserSerializer,
     UserUpdateSerializer,
     CustomTokenObtainPairSerializer,
-    ProjectSerializer, TaskSerializer, CommentSerializer
+    ProjectSerializer, ProjectMembersSerializer, TaskSerializer, CommentSerializer
 )
-from .permissions import IsAdminUserJWT, IsAdminOrProjectAccess, IsProjectManagerOrAdmin, IsAdminOrPMOrTL, IsDeveloperUpdatingOwnStatus
+from .permissions import IsAdminUserJWT, IsProjectManagerOrAdmin, IsAdminOrPMOrTL, IsDeveloperUpdatingOwnStatus
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
 from .exceptions import InvalidUserDataException
-from .notify import notify_tech_lead_on_task_update
+from .fastpath import ValuesListMixin
+from .fieldsets import ExpandQuerysetMixin, SparseQuerysetMixin
+from .cache import cache_response
+from .conditional import ConditionalListMixin, ConditionalObjectMixin
+from .membership import is_project_member
+from .policy import POLICY, PolicyObjectMixin, allowed_ids, authorized
+from .notify import enqueue_task_update
+from .pagination import KeysetPagination
+from .routers import ReplicaReadMixin
 from rest_framework.filters import SearchFilter
-from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.exceptions import ValidationError
 
 
 
@@ -66,9 +75,8 @@ class CreateUserView(generics.CreateAPIView):
 
 
 
-@method_decorator(vary_on_headers("Authorization"), name='dispatch')
-@method_decorator(cache_page(60 * 2), name='dispatch') 
-class ListUsersView(generics.ListAPIView):
+@method_decorator(cache_response(), name='dispatch')
+class ListUsersView(SparseQuerysetMixin, generics.ListAPIView):
     queryset = User.objects.only('id', 'email', 'name', 'role')
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUserJWT]
@@ -78,9 +86,8 @@ class ListUsersView(generics.ListAPIView):
         return Response(response.data, status=status.HTTP_200_OK)
 
 
-@method_decorator(vary_on_headers("Authorization"), name='dispatch')
-@method_decorator(cache_page(60 * 2), name='dispatch')
-class RetrieveUserView(generics.RetrieveAPIView):
+@method_decorator(cache_response(), name='dispatch')
+class RetrieveUserView(SparseQuerysetMixin, generics.RetrieveAPIView):
     queryset = User.objects.only('id', 'email', 'name', 'role')
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUserJWT]
@@ -91,6 +98,17 @@ class RetrieveUserView(generics.RetrieveAPIView):
         return Response(response.data, status=status.HTTP_200_OK)
 
 
+class CacheStatsView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminUserJWT]
+
+    def get(self, request, *args, **kwargs):
+        # Counters are per worker process; sample a few workers to size the tiers.
+        if not hasattr(cache, 'stats'):
+            return Response({"detail": "The configured cache backend does not report statistics."},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response(cache.stats(), status=status.HTTP_200_OK)
+
+
 class AdminUpdateUserView(generics.UpdateAPIView):
     queryset = User.objects.all()
     serializer_class = UserUpdateSerializer
@@ -132,11 +150,11 @@ class UserSelfUpdateView(generics.RetrieveUpdateAPIView):
 
 
 
-@method_decorator(vary_on_headers("Authorization"), name='dispatch')
-@method_decorator(cache_page(60 * 2), name='dispatch')  # Cache for 2 minutes
-class ProjectListCreateView(generics.ListCreateAPIView):
+@method_decorator(cache_response(), name='dispatch')
+class ProjectListCreateView(ReplicaReadMixin, ConditionalListMixin, ExpandQuerysetMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectManagerOrAdmin]
+    pagination_class = KeysetPagination
 
 
     def get_queryset(self):
@@ -165,39 +183,32 @@ class ProjectListCreateView(generics.ListCreateAPIView):
         return Response({"message": "Project created successfully"}, status=status.HTTP_201_CREATED)
 
 
-    def get(self, request, *args, **kwargs):
+    def list(self, request, *args, **kwargs):
         # Get filtered projects
-        projects = self.get_queryset()
-        if projects.exists():
-            return Response(self.get_serializer(projects, many=True).data, status=status.HTTP_200_OK)
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        if page or self.paginator.cursor is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
         return Response({"detail": "No projects found."}, status=status.HTTP_404_NOT_FOUND)
 
 
 
-@method_decorator(vary_on_headers("Authorization"), name='dispatch')
-@method_decorator(cache_page(60 * 2), name='dispatch')  # Cache for 2 minutes
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+@method_decorator(cache_response(), name='dispatch')
+class ProjectDetailView(PolicyObjectMixin, ConditionalObjectMixin, ExpandQuerysetMixin, SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
-    permission_classes = [permissions.IsAuthenticated, IsAdminOrProjectAccess]
+    permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'id'
+    lookup_url_kwarg = 'pk'
 
 
-    def get(self, request, *args, **kwargs):
-        project = self.get_object()
-        return Response(self.get_serializer(project).data, status=status.HTTP_200_OK)
+    def get_policy_action(self):
+        # Members and the creator can view (and delete); only an admin or a member PM can update.
+        return {'PUT': 'update', 'PATCH': 'update', 'DELETE': 'delete'}.get(self.request.method, 'view')
 
 
-    def update(self, request, *args, **kwargs):
+    def retrieve(self, request, *args, **kwargs):
         project = self.get_object()
-        user = request.user
-
-
-        if user.role == 'ADMIN' or (user.role == 'PROJECT_MANAGER' and user in project.members.all()):
-            return super().update(request, *args, **kwargs)
-        else:
-            return Response({"detail": "You do not have permission to perform this action."},
-                            status=status.HTTP_403_FORBIDDEN)
+        return Response(self.get_serializer(project).data, status=status.HTTP_200_OK)
 
 
     def destroy(self, request, *args, **kwargs):
@@ -219,33 +230,70 @@ class ProjectDeleteView(generics.DestroyAPIView):
 
 
 
-class ProjectUpdateView(generics.UpdateAPIView):
+class ProjectUpdateView(PolicyObjectMixin, generics.UpdateAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'id'
+    policy_action = 'update'  # Admin, or a Project Manager who is a member
 
 
-    def update(self, request, *args, **kwargs):
-        project = self.get_object()
-        user = request.user
+class ProjectMembersView(PolicyObjectMixin, generics.GenericAPIView):
+    """
+    POST {"members": [user ids]} to add-members/ or remove-members/: only
+    the difference is written, so one person joining a large project doesn't
+    rewrite the whole set the way PUT does. The rows are written straight
+    through the members table (add()/remove() would read them again) and
+    m2m_changed is sent as add()/remove() would, for core/signals.py.
+    """
+    queryset = Project.objects.all()
+    serializer_class = ProjectMembersSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'id'
+    policy_action = 'update'  # Admin, or a Project Manager who is a member
+    operation = None  # 'add' or 'remove', set in urls.py
 
 
-        if user.role == 'ADMIN' or (user.role == 'PROJECT_MANAGER' and user in project.members.all()):
-            return super().update(request, *args, **kwargs)
-        else:
-            return Response({"detail": "You do not have permission to perform this action."},
-                            status=status.HTTP_403_FORBIDDEN)
+    def post(self, request, *args, **kwargs):
+        project = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = {user.pk for user in serializer.validated_data['members']}
+
+        through = Project.members.through
+        current = set(
+            through.objects.filter(project_id=project.pk, user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        changed = user_ids - current if self.operation == 'add' else current
+        if changed:
+            with transaction.atomic():
+                self.send_members_changed(project, 'pre', changed)
+                if self.operation == 'add':
+                    through.objects.bulk_create(
+                        [through(project_id=project.pk, user_id=pk) for pk in changed], ignore_conflicts=True,
+                    )
+                else:
+                    through.objects.filter(project_id=project.pk, user_id__in=changed).delete()
+                self.send_members_changed(project, 'post', changed)
+        message = f"{len(changed)} members {'added' if self.operation == 'add' else 'removed'}."
+        return Response({"message": message, "members": sorted(changed)}, status=status.HTTP_200_OK)
+
+
+    def send_members_changed(self, project, when, user_ids):
+        m2m_changed.send(
+            sender=Project.members.through, instance=project, action=f'{when}_{self.operation}',
+            reverse=False, model=User, pk_set=set(user_ids), using=router.db_for_write(Project),
+        )
 
 
 # Task List view with caching, project membership, status filtering, and additional search filters
-@method_decorator(vary_on_headers("Authorization"), name='dispatch')
-@method_decorator(cache_page(60 * 2), name='dispatch')  # Cache for 2 minutes
-class TaskListView(generics.ListAPIView):
+@method_decorator(cache_response(), name='dispatch')
+class TaskListView(ReplicaReadMixin, ConditionalListMixin, ValuesListMixin, ExpandQuerysetMixin, SparseQuerysetMixin, generics.ListAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = (SearchFilter,)
     search_fields = ['title', 'project__name']  # Allow searching by task title and project name
+    pagination_class = KeysetPagination
 
 
     def get_queryset(self):
@@ -255,11 +303,8 @@ class TaskListView(generics.ListAPIView):
         project_name_filter = self.request.query_params.get('project_name', None)  # Correct query parameter for project name
 
 
-        # Start with the base queryset, filtering by project membership
-        if user.role == 'ADMIN':
-            queryset = Task.objects.all()  # Admin can see all tasks
-        else:
-            queryset = Task.objects.filter(project__members=user) 
+        # Start with the base queryset, filtering by project membership (admins see all tasks)
+        queryset = authorized(Task.objects.all(), user, 'view')
 
 
         # Apply the status filter if provided
@@ -280,10 +325,10 @@ class TaskListView(generics.ListAPIView):
         return queryset
 
 
-    def get(self, request, *args, **kwargs):
-        tasks = self.get_queryset()
-        if tasks.exists():
-            return Response(self.get_serializer(tasks, many=True).data, status=status.HTTP_200_OK)
+    def list(self, request, *args, **kwargs):
+        page, data = self.list_page()
+        if page or self.paginator.cursor is not None:
+            return self.get_paginated_response(data)
         return Response({"detail": "No tasks found."}, status=status.HTTP_404_NOT_FOUND)
 
 
@@ -294,45 +339,34 @@ class TaskCreateView(generics.CreateAPIView):
 
 
     def perform_create(self, serializer):
-        title = serializer.validated_data.get('title')
-        project = serializer.validated_data.get('project')
-
-
-        # Check for existing task with the same title under the same project
-        if Task.objects.filter(title=title, project=project).exists():
-            raise ValidationError("A task with this title already exists in the project.")
-
-
+        # A duplicate title in the project is rejected by the unique constraint (TaskSerializer.save).
         serializer.save(created_by=self.request.user)
         return Response({"message": "Task created successfully"}, status=status.HTTP_201_CREATED)
 
 
 
-@method_decorator(vary_on_headers("Authorization"), name='dispatch')
-@method_decorator(cache_page(60 * 2), name='dispatch')  # Cache for 2 minutes
-class TaskDetailView(generics.RetrieveAPIView):
+@method_decorator(cache_response(), name='dispatch')
+class TaskDetailView(ConditionalObjectMixin, ExpandQuerysetMixin, SparseQuerysetMixin, generics.RetrieveAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'ADMIN':
-            return Task.objects.all()
-        return Task.objects.filter(project__members=user)
+        return authorized(Task.objects.all(), self.request.user, 'view')
 
 
-    def get(self, request, *args, **kwargs):
+    def retrieve(self, request, *args, **kwargs):
         task = self.get_object()
         if task:
             return Response(self.get_serializer(task).data, status=status.HTTP_200_OK)
         return Response({"detail": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
 
 
-class TaskUpdateView(generics.UpdateAPIView):
+class TaskUpdateView(PolicyObjectMixin, generics.UpdateAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    policy_action = 'update'  # Admin, PM and TL any task; developers only their own
 
 
     def get_permissions(self):
@@ -342,28 +376,12 @@ class TaskUpdateView(generics.UpdateAPIView):
         return [permissions.IsAuthenticated(), IsDeveloperUpdatingOwnStatus()]
 
 
-    def update(self, request, *args, **kwargs):
-        task = self.get_object()
-        user = request.user
-        if user.role in ['ADMIN', 'PROJECT_MANAGER', 'TECH_LEAD'] or task.assigned_to == user:
-            return super().update(request, *args, **kwargs)
-        return Response({"detail": "You do not have permission to update this task."},
-                        status=status.HTTP_403_FORBIDDEN)
-
-
-class DeveloperTaskStatusUpdateView(generics.UpdateAPIView):
+class DeveloperTaskStatusUpdateView(PolicyObjectMixin, generics.UpdateAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ['patch']  # Only allow PATCH
-
-
-    def get_object(self):
-        task = super().get_object()
-        user = self.request.user
-        if user.role != 'DEVELOPER' or task.assigned_to != user:
-            raise PermissionDenied("You can only update the status of tasks assigned to you.")
-        return task
+    policy_action = 'update_status'  # Developers, on tasks assigned to them
 
 
     def partial_update(self, request, *args, **kwargs):
@@ -381,8 +399,10 @@ class DeveloperTaskStatusUpdateView(generics.UpdateAPIView):
 
 
         task.status = status_value
-        task.save()
-        notify_tech_lead_on_task_update(task)
+        # The e-mail is queued with the task change and sent by the outbox worker.
+        with transaction.atomic():
+            task.save(update_fields=['status', 'updated_at'])
+            enqueue_task_update(task, request.user.name)
         return Response({"detail": "Task status updated successfully."})
 
 
@@ -432,22 +452,15 @@ class CommentCreateView(generics.CreateAPIView):
             return Response({"detail": "Invalid project ID."}, status=status.HTTP_404_NOT_FOUND)
 
 
-        try:
-            task = Task.objects.get(id=task_id)
-        except Task.DoesNotExist:
+        if not Task.objects.filter(id=task_id).exists():
             return Response({"detail": "Invalid task ID."}, status=status.HTTP_404_NOT_FOUND)
 
         if user.role in ['PROJECT_MANAGER', 'TECH_LEAD', 'DEVELOPER', 'CLIENT']:
-            if user not in project.members.all():
+            if not is_project_member(user, project):
                 return Response({"detail": "You can only comment on projects that you are assigned to."}, 
                                 status=status.HTTP_403_FORBIDDEN)
 
-        if Comment.objects.filter(content=content.strip(), created_by=user, project=project, task=task).exists():
-            return Response(
-                {"detail": "Duplicate comment: You already posted this content for the same task/project."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
+        # Duplicates are rejected by the serializer on the unique content digest.
         serializer = self.get_serializer(data={
             "content": content,
             "project": project_id,
@@ -460,96 +473,59 @@ class CommentCreateView(generics.CreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-@method_decorator(vary_on_headers("Authorization"), name='dispatch')
-@method_decorator(cache_page(60 * 2), name='dispatch') 
-class CommentListView(generics.ListAPIView):
+@method_decorator(cache_response(per_user_roles=('DEVELOPER',)), name='dispatch')
+class CommentListView(ReplicaReadMixin, ValuesListMixin, ExpandQuerysetMixin, SparseQuerysetMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'ADMIN':
-            return Comment.objects.all()  # Admin can see all comments
-        elif user.role == 'PROJECT_MANAGER':
-            return Comment.objects.filter(project__created_by=user)  # PM can see comments for their projects
-        elif user.role == 'TECH_LEAD':
-            return Comment.objects.filter(project__members=user)  # Tech Lead can see comments for assigned projects
-        elif user.role == 'DEVELOPER':
-            return Comment.objects.filter(task__assigned_to=user)  # Developer can see comments on tasks assigned to them
-        elif user.role == 'CLIENT':
-            return Comment.objects.filter(project__members=user)  # Clients can see comments for their projects
-        return Comment.objects.none()  # Return no comments if role is not recognized
+        # Admin: all; PM: their projects; TL and client: assigned projects; developer: their tasks (core/policy.py)
+        return authorized(Comment.objects.all(), self.request.user, 'view')
 
 
     def get(self, request, *args, **kwargs):
-        comments = self.get_queryset()
-        if comments.exists():
-            return Response(self.get_serializer(comments, many=True).data, status=status.HTTP_200_OK)
+        page, data = self.list_page()
+        if page or self.paginator.cursor is not None:
+            return self.get_paginated_response(data)
         return Response({"detail": "No comments found."}, status=status.HTTP_404_NOT_FOUND)
 
 
-class CommentDeleteView(generics.DestroyAPIView):
+class CommentDeleteView(PolicyObjectMixin, generics.DestroyAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    policy_action = 'delete'  # Role-specific rules in core/policy.py
 
 
-    def perform_destroy(self, instance):
-        user = self.request.user
-        comment = instance
-
-        # Role-specific delete permissions
-        if user.role == 'ADMIN':
-            pass  # Admin can delete any comment
-        elif user.role == 'PROJECT_MANAGER':
-            if comment.project.created_by != user:
-                raise PermissionDenied("Project Managers can only delete comments on their own projects.")
-        elif user.role == 'TECH_LEAD':
-            if user not in comment.project.members.all():
-                raise PermissionDenied("Tech Leads can only delete comments from their assigned projects.")
-        elif user.role == 'DEVELOPER':
-            if comment.created_by != user:
-                raise PermissionDenied("Developers can only delete their own comments.")
-            if user not in comment.project.members.all():
-                raise PermissionDenied("Developers must be assigned to the project to delete a comment.")
-        elif user.role == 'CLIENT':
-            if user not in comment.project.members.all():
-                raise PermissionDenied("Clients can only delete comments from their assigned projects.")
-        else:
-            raise PermissionDenied("Your role is not allowed to delete comments.")
-
-        comment.delete()
-        return Response({"detail": "Comment deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
-
-
-class CommentUpdateView(generics.UpdateAPIView):
+class CommentUpdateView(PolicyObjectMixin, generics.UpdateAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    policy_action = 'update'  # Role-specific rules in core/policy.py
 
 
-    def perform_update(self, serializer):
-        user = self.request.user
-        comment = self.get_object()
+class PolicyCheckView(generics.GenericAPIView):
+    """
+    Batch permission check: which of ``ids`` may the requester ``action``?
+    Body: {"resource": "task", "action": "update", "ids": [1, 2, 3]}
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
-        if user.role == 'ADMIN':
-            pass  # Admin can update any comment
-        elif user.role == 'PROJECT_MANAGER':
-            if comment.project.created_by != user:
-                raise PermissionDenied("Project Managers can only update comments on their own projects.")
-        elif user.role == 'TECH_LEAD':
-            if user not in comment.project.members.all():
-                raise PermissionDenied("Tech Leads can only update comments from their assigned projects.")
-        elif user.role == 'DEVELOPER':
-            if comment.created_by != user:
-                raise PermissionDenied("Developers can only update their own comments.")
-            if user not in comment.project.members.all():
-                raise PermissionDenied("Developers must be assigned to the project to update a comment.")
-        elif user.role == 'CLIENT':
-            if user not in comment.project.members.all():
-                raise PermissionDenied("Clients can only update comments from their assigned projects.")
-        else:
-            raise PermissionDenied("Your role is not allowed to update comments.")
-        serializer.save()
-        return Response({"detail": "Comment updated successfully."}, status=status.HTTP_200_OK)
+
+    def post(self, request, *args, **kwargs):
+        resource = request.data.get('resource')
+        action = request.data.get('action')
+        ids = request.data.get('ids')
+
+        if (resource, action) not in POLICY:
+            return Response({"detail": "Unknown resource or action."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            return Response({"detail": "ids must be a list of integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        allowed = allowed_ids(request.user, action, resource, ids)
+        return Response({
+            "allowed": sorted(allowed),
+            "denied": sorted(set(ids) - allowed),
+        })
@@ -0,0 +1,23 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+# Kept free of model imports: spawned workers import this module before the
+# app registry is ready.
+
+
+def _init_worker():
+    django.setup()
+
+
+def process_pool(processes):
+    """
+    A pool of ``processes`` workers with Django set up, or None for 0.
+    Workers are spawned rather than forked so they open their own database
+    connections instead of sharing the parent's.
+    """
+    if processes <= 0:
+        return None
+    return ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                               mp_context=multiprocessing.get_context('spawn'))
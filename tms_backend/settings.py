@@ -48,11 +48,12 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.routers.PrimaryStickinessMiddleware',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -66,6 +67,41 @@ REST_FRAMEWORK = {
 
 }
 
+# Bulk task endpoint (core/bulk.py): items per request, rows per INSERT/UPDATE statement
+BULK_TASK_MAX_ITEMS = env('BULK_TASK_MAX_ITEMS', default=1000, cast=int)
+BULK_TASK_BATCH_SIZE = env('BULK_TASK_BATCH_SIZE', default=200, cast=int)
+
+# Upper bound for ?page_size= on the cursor-paginated list endpoints
+KEYSET_PAGINATION_MAX_PAGE_SIZE = env('KEYSET_PAGINATION_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Authenticated requests read the user record from the cache; saves and deletes drop it (core/signals.py)
+AUTH_USER_CACHE_TIMEOUT = env('AUTH_USER_CACHE_TIMEOUT', default=60 * 10, cast=int)
+# ...with a short-lived copy in each worker. A save evicts the copy only in the worker that made it:
+# in the others a deactivated, demoted or re-passworded user keeps the old record for up to
+# AUTH_USER_LOCAL_TIMEOUT seconds. Set it to 0 to read the shared record on every request.
+AUTH_USER_LOCAL_TIMEOUT = env('AUTH_USER_LOCAL_TIMEOUT', default=5, cast=int)
+AUTH_USER_LOCAL_MAX_ENTRIES = env('AUTH_USER_LOCAL_MAX_ENTRIES', default=1000, cast=int)
+
+# Cached GET responses are invalidated by writes (core/signals.py), so the TTL only bounds memory
+RESPONSE_CACHE_TIMEOUT = env('RESPONSE_CACHE_TIMEOUT', default=60 * 60 * 6, cast=int)
+
+# Process-local LRU in front of a SQLite file shared by all workers on the host.
+# Generation tokens (gen:*) change on every write, so they always go to the shared tier.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'LOCATION': env('CACHE_LOCATION', default=str(BASE_DIR / 'cache.sqlite3')),
+        'TIMEOUT': RESPONSE_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': env('CACHE_MAX_ENTRIES', default=50000, cast=int),
+            'CULL_FREQUENCY': 4,
+            'L1_MAX_ENTRIES': env('CACHE_L1_MAX_ENTRIES', default=1000, cast=int),
+            'L1_TIMEOUT': env('CACHE_L1_TIMEOUT', default=60, cast=int),
+            'L2_ONLY_PREFIXES': ['gen:', 'membership:', 'created:', 'authuser:'],
+        },
+    }
+}
+
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -105,18 +141,57 @@ WSGI_APPLICATION = 'tms_backend.wsgi.application'
 import sys
 from pathlib import Path
 
+# Writers take the lock when their transaction starts (IMMEDIATE), so a
+# blocked writer waits out busy_timeout instead of failing mid-transaction
+# with "database is locked".
+SQLITE_OPTIONS = {
+    'transaction_mode': env('SQLITE_TRANSACTION_MODE', default='IMMEDIATE'),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        'CONN_MAX_AGE': env('CONN_MAX_AGE', default=60 * 5, cast=int),  # seconds; 0 closes after each request
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Run on every new SQLite connection, in this order (core/db.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': env('SQLITE_JOURNAL_MODE', default='WAL'),  # readers don't block behind the writer
+    'busy_timeout': env('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),  # ms to wait for a lock
+    'synchronous': env('SQLITE_SYNCHRONOUS', default='NORMAL'),  # durable at checkpoints; safe with WAL
+    'mmap_size': env('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),  # bytes
+    'cache_size': env('SQLITE_CACHE_SIZE', default=-64 * 1024, cast=int),  # negative: KiB per connection
+    'temp_store': env('SQLITE_TEMP_STORE', default='MEMORY'),
+}
+
+# Read replicas for the list and report views (core/routers.py): comma-separated
+# SQLite files refreshed from the primary with `python manage.py sync_replicas`.
+DATABASE_REPLICAS = []
+for number, path in enumerate(env.list('DATABASE_REPLICAS', default=[]), 1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'NAME': path}
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# After a write, the writer (and readers of the changed data) stay on the primary this long
+REPLICA_STICKY_SECONDS = env('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
 if 'test' in sys.argv:
-    DATABASES['default'] = {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'test_db.sqlite3',  # Use a separate test database file
-        }
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'test_db.sqlite3',  # Use a separate test database file
+            'OPTIONS': SQLITE_OPTIONS,
+        },
+    }
+    # Routed to only by the tests that enable it (core/tests/test_replicas.py)
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': BASE_DIR / 'test_replica.sqlite3'}
+    DATABASE_REPLICAS = []
+    CACHES['default']['LOCATION'] = ':memory:'  # Never reuse cached responses across test runs
 
 
 
@@ -156,6 +231,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded and generated files (progress reports live under MEDIA_ROOT/reports/)
+MEDIA_ROOT = env('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+MEDIA_URL = 'media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -170,6 +249,18 @@ EMAIL_PORT = env('EMAIL_PORT', default=2525, cast=int)
 EMAIL_USE_TLS = env('EMAIL_USE_TLS', default=True, cast=bool)
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='noreply@task-management-system.com')
 
+# Task notifications are queued in the outbox and sent by `python manage.py send_notifications`
+NOTIFICATION_BATCH_SIZE = env('NOTIFICATION_BATCH_SIZE', default=100, cast=int)
+NOTIFICATION_MAX_ATTEMPTS = env('NOTIFICATION_MAX_ATTEMPTS', default=5, cast=int)
+NOTIFICATION_RETRY_BACKOFF = env('NOTIFICATION_RETRY_BACKOFF', default=30, cast=int)  # seconds, doubled per attempt
+# Seconds a status change waits to be coalesced into one digest per tech lead; 0 sends one e-mail per change
+NOTIFICATION_DIGEST_WINDOW = env('NOTIFICATION_DIGEST_WINDOW', default=60, cast=int)
+
+
 
 
 
+# PDF progress reports are rendered by `python manage.py run_report_jobs`
+REPORT_WORKER_PROCESSES = env('REPORT_WORKER_PROCESSES', default=2, cast=int)
+# Seconds after which a RUNNING report job is assumed lost and queued again
+REPORT_JOB_TIMEOUT = env('REPORT_JOB_TIMEOUT', default=600, cast=int)